@@ -1,30 +1,36 @@
-from .drih_utils import noco
+from .drih_utils import (
+    noco,
+    clear_dataset,
+    open_dataset,
+    QuadBuffer,
+    SnapshotCache,
+    STORES,
+    Transport,
+)
+from .drih_utils.nquads import NQuadsWriter, parse_nquads
+from .drih_utils.stages import Stages, measure, memory_usage, timed
 from rdflib import Namespace
 from rdflib.namespace import DCAT, DCTERMS, RDF, RDFS
 
-from rdflib import Dataset, Graph
+from rdflib import Graph, Literal
 
 
 import os
-from .person import Person
-from .team import Team
-from .group import Group
-from .access_point import AccessPoint
-from .service import Service
-from .digital_curating_service import DigitalCuratingService
-from .digital_hosting_service import DigitalHostingService
-from .volatile_dataset import VolatileDataset
-from .persistent_dataset import PersistentDataset
-from .digital_machine_event import DigitalMachineEvent
-from .project import Project
-from .topic import Topic
-from .digital_object import DigitalObject
-from .overall_graph import OverallGraph
+import json
+import multiprocessing
+import tempfile
+import tracemalloc
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from .overall_graph import OUTPUTS, OverallGraph
+from .pattern_builder import PatternBuilder
+from .mapping import MAPPINGS, TABLES
+from .emitter import compile_mappings, visualise
+from .relations import RELATIONS, resolve_relations, table_fields
 import argparse
 from .data_test import ActorTests, ActivitieTests, DigitalObjectTests
 
-noco = noco()
-
 parser = argparse.ArgumentParser(
     description="ingests data from nocodb and load it onto a RS instance at 'remote_url'"
 )
@@ -62,35 +68,233 @@ parser.add_argument(
     required=False,
 )
 
+parser.add_argument(
+    "-page_size",
+    help="number of rows fetched from nocodb per request (default: 1000)",
+    type=int,
+    default=noco.PAGE_SIZE,
+    required=False,
+)
+
+parser.add_argument(
+    "-fetch_workers",
+    help="number of nocodb tables fetched concurrently (default: 1)",
+    type=int,
+    default=1,
+    required=False,
+)
+
+parser.add_argument("-cache", action="store_true",
+                    help="keep snapshots of the nocodb tables in -cache_dir and only download tables that changed")
+
+parser.add_argument("-offline", action="store_true",
+                    help="run from the snapshots in -cache_dir alone, without contacting nocodb")
+
+parser.add_argument("-incremental", action="store_true",
+                    help="only fetch the nocodb rows changed since the last successful -incremental run and only rebuild the entities they affect")
+
+parser.add_argument("-reuse", action="store_true",
+                    help="reuse the quads of the last -reuse run for the named graphs whose rows, links and mapping did not change")
+
+parser.add_argument(
+    "-cache_dir",
+    help="directory of the nocodb table snapshots (default: output/cache/)",
+    type=str,
+    default=SnapshotCache.CACHE_DIR,
+    required=False,
+)
+
+parser.add_argument(
+    "-timeout",
+    help="read timeout in seconds of the requests to nocodb and the remote (default: 300)",
+    type=float,
+    default=Transport.TIMEOUT[1],
+    required=False,
+)
+
+parser.add_argument(
+    "-retries",
+    help="number of retries, with exponential backoff, of requests failing with 429 or 5xx (default: 5)",
+    type=int,
+    default=Transport.RETRIES,
+    required=False,
+)
+
+parser.add_argument("-gzip_push", action="store_true",
+                    help="gzip the trig file pushed to the remote")
+
+parser.add_argument(
+    "-store",
+    help="triple store the graph is built in: memory, or sqlite and berkeleydb which keep it on disk in -store_path (default: memory)",
+    choices=list(STORES),
+    default="memory",
+    required=False,
+)
+
+parser.add_argument(
+    "-store_path",
+    help="file (sqlite) or directory (berkeleydb) of the -store (default: output/store.sqlite, output/store.bdb/)",
+    type=str,
+    default=None,
+    required=False,
+)
+
+parser.add_argument(
+    "-workers",
+    help="number of processes building the entity graphs, with -stream (default: 1)",
+    type=int,
+    default=1,
+    required=False,
+)
+
+parser.add_argument(
+    "-vocab",
+    action="store_true",
+    help="declare the shared types once in the vocabulary named graph instead of in every entity graph",
+)
+
+parser.add_argument(
+    "-stream",
+    action="store_true",
+    help="write the quads of every entity straight to the n-quads output as they are built and derive the trig and turtle outputs from it, instead of holding the graph in memory",
+)
+
+parser.add_argument(
+    "-stage_workers",
+    help="number of threads running the stages of the run (relations, the graphs of each table, serialization, push ...) as soon as their inputs are done (default: 1)",
+    type=int,
+    default=1,
+    required=False,
+)
+
+parser.add_argument(
+    "-profile",
+    action="store_true",
+    help="write the wall and cpu time, row and quad counts and throughput of every stage to output/metrics.json",
+)
+
+parser.add_argument(
+    "-pstats",
+    action="store_true",
+    help="write a cProfile dump of every stage to output/profile/<stage>.pstats",
+)
+
+parser.add_argument(
+    "-memory",
+    action="store_true",
+    help="trace the memory retained and the peak of every stage and of the fetch with tracemalloc, and the bytes per quad of the store (slows the run down)",
+)
+
+parser.add_argument(
+    "-formats",
+    help="outputs the graph is serialized to: nquads (output/rdf/overall_nquads.txt), trig (overall_trig.trig) and ttl (overall_flat.ttl), the trig and turtle are derived from the n-quads at the same time (default: all)",
+    nargs="+",
+    choices=list(OUTPUTS),
+    default=list(OUTPUTS),
+    required=False,
+)
+
 args = parser.parse_args()
+if args.reuse and args.incremental:
+    parser.error("-reuse and -incremental cannot be combined")
+if args.stream and (args.reuse or args.incremental):
+    parser.error("-stream cannot be combined with -reuse or -incremental")
+if args.stream and args.store != "memory":
+    parser.error("-stream builds no -store")
+if args.store_path and args.store == "memory":
+    parser.error("-store_path needs a persistent -store, sqlite or berkeleydb")
+if args.workers > 1 and not args.stream:
+    # adding the quads of the workers to a store costs more than building them
+    parser.error("-workers needs -stream")
+if args.push and "trig" not in args.formats:
+    parser.error("-push sends the trig output, -formats has to include trig")
+if args.reuse and args.store == "memory" and "nquads" not in args.formats:
+    parser.error("-reuse reads back the n-quads output without a persistent -store, -formats has to include nquads")
+if args.memory:
+    # before the fetch, the rows are the first big allocation
+    tracemalloc.start()
+
+# one connection pool for nocodb and the remote
+transport = Transport(
+    pool_size=args.fetch_workers,
+    timeout=(Transport.TIMEOUT[0], args.timeout),
+    retries=args.retries,
+)
+
+noco = noco(
+    page_size=args.page_size,
+    max_workers=args.fetch_workers,
+    cache=SnapshotCache(args.cache_dir)
+    if args.cache or args.offline or args.incremental
+    else None,
+    offline=args.offline,
+    incremental=args.incremental,
+    transport=transport,
+)
+
+# graph of the last successful -incremental run, or the persistent -store
+# holding it
+GRAPH_SNAPSHOT = os.path.join(args.cache_dir, "graph.nq")
+GRAPH_STORE = os.path.join(args.cache_dir, "graph.json")
+# options the graph of the last -incremental run was built with
+GRAPH_OPTIONS = os.path.join(args.cache_dir, "graph.options.json")
+# digests of the named graphs in the output of the last -reuse run
+MANIFEST = "output/manifest.json"
+METRICS = "output/metrics.json"
+PROFILE_DIR = "output/profile/"
+NQUADS_OUTPUT = OUTPUTS["nquads"]
+# a persistent -store holding the graph of the last -incremental or -reuse run
+# has the reference the run saved (GRAPH_STORE, MANIFEST) next to it, the next
+# run starts from the store
+STORE_PATH = args.store_path or STORES[args.store]
+STORE_RUN = STORE_PATH.rstrip("/") + ".run.json" if STORE_PATH else None
+RUN_ID = uuid.uuid4().hex
+
+
+class DanglingReferenceError(LookupError):
+    """A link points to a row that does not exist (or is empty)."""
 
 
 class DataService:
+    # attribute -> nocodb table
+    TABLES = TABLES
+
     def __init__(self):
         print("data_source_started")
-        self.types = noco.get_rows("E55_Types")
-        self.projects = noco.get_rows("PE45_Research_Projects")
-        self.persons = noco.get_rows("E21_Persons")
-        self.teams = noco.get_rows("PE34_Teams")
-        self.groups = noco.get_rows("E74_Groups")
-        self.services = noco.get_rows("PE1_Services")
-        self.digital_objects = noco.get_rows("D1_Digital_Objects")
-        self.digital_curating_services = noco.get_rows(
-            "PE10_Digital_Curating_Services")
-        self.digital_hosting_services = noco.get_rows(
-            "PE5_Digital_Hosting_Services")
-        self.volatile_datasets = noco.get_rows("PE24_Volatile_Datasets")
-        self.persistent_datasets = noco.get_rows("PE22_Persistent_Datasets")
-        self.access_points = noco.get_rows("PE26_Access_Points")
-        self.digital_machine_events = noco.get_rows(
-            "D7_Digital_Machine_Events")
-        self.namespaces = noco.get_rows("Meta_Namespaces")
-        self.topics = noco.get_rows("Topics")
+        tables = noco.get_tables(
+            self.TABLES.values(),
+            fields={
+                table_name: self.fields(attribute)
+                for attribute, table_name in self.TABLES.items()
+            },
+        )
+        for attribute, table_name in self.TABLES.items():
+            setattr(self, attribute, tables[table_name])
+
+        # attribute -> Id -> row, to resolve the links between rows
+        self.index = {}
+        for attribute in self.TABLES:
+            self.set_rows(attribute, getattr(self, attribute))
+
+    def set_rows(self, attribute, rows):
+        setattr(self, attribute, rows)
+        self.index[attribute] = {row["Id"]: row for row in rows}
+
+    def lookup(self, attribute, row_id):
+        try:
+            return self.index[attribute][row_id]
+        except KeyError:
+            raise DanglingReferenceError(
+                f"no row with Id {row_id} in {self.TABLES[attribute]}"
+            ) from None
+
+    def fields(self, attribute):
+        return table_fields(attribute)
 
 
 class NameSpacesService:
-    def __init__(self, namespaces: dict):
-        self.namespaces = noco.get_rows("Meta_Namespaces")
+    def __init__(self, namespaces: list):
+        self.namespaces = namespaces
 
         # default namespaces
         self.DCAT = DCAT
@@ -124,365 +328,343 @@ class NameSpacesService:
                 "long_form"
             ]
         )
-
-
-top_store = Dataset()
+        # shared by the entities to add the recurring patterns
+        self.pattern_builder = PatternBuilder(namespaces)
+
+
+def store_reference():
+    """The persistent -store as the graph of this run."""
+    return {"store": args.store, "path": os.path.abspath(STORE_PATH), "run": RUN_ID}
+
+
+def last_store_reference():
+    """The store the last -incremental or -reuse run left its graph in."""
+    try:
+        if args.incremental:
+            with open(GRAPH_STORE) as f:
+                return json.load(f)
+        if args.reuse:
+            with open(MANIFEST) as f:
+                return json.load(f).get("store")
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+keep_store = False
+if STORE_RUN is not None and os.path.exists(STORE_RUN):
+    with open(STORE_RUN) as f:
+        keep_store = json.load(f) == last_store_reference()
+    # the store no longer holds the graph of that run once this one changes it
+    os.remove(STORE_RUN)
+top_store = open_dataset(args.store, STORE_PATH, clear=not keep_store)
 data_service = DataService()
+# memory the fetched rows hold, with -memory
+fetch_memory = memory_usage() if args.memory else None
 namespaces_service = NameSpacesService(data_service.namespaces)
+namespaces_service.pattern_builder.bind(top_store)
+if args.stream:
+    os.makedirs(os.path.dirname(NQUADS_OUTPUT), exist_ok=True)
+    # the entities write their quads to the output, top_store stays empty
+    quads = NQuadsWriter(
+        NQUADS_OUTPUT, unique_graphs=[namespaces_service.CKG["vocabulary"]]
+    )
+else:
+    # the entities add their triples to top_store through this buffer
+    quads = QuadBuffer(top_store)
+# attribute -> emitter of the quads of the rows, compiled from MAPPINGS
+emitters = compile_mappings(
+    MAPPINGS, namespaces_service.pattern_builder, data_service.index
+)
 
-
-def load_persons(create_diagrams=False):
-    print("loading persons")
-    for person_data in data_service.persons:
-        person = Person(person_data, namespaces_service, top_store)
-
-        person.populate_graph()
-        if create_diagrams:
-            person.visualise()
-
-
-def load_teams(create_diagrams=False):
-    print("loading teams")
-    for team_data in data_service.teams:
-        team_data["persons"] = []
-        for member_ref in team_data["members"]:
-            member = next(
-                item for item in data_service.persons if item["Id"] == member_ref["Id"]
-            )
-            team_data["persons"].append(member)
-        team = Team(team_data, namespaces_service, top_store)
-        team.populate_graph()
-        if create_diagrams:
-            team.visualise()
-
-
-def load_groups(create_diagrams=False):
-    print("loading groups")
-    for group_data in data_service.groups:
-        group_data["persons"] = []
-        group_data["groups"] = []
-        for member_ref in group_data["members"]:
-            member = next(
-                item for item in data_service.persons if item["Id"] == member_ref["Id"]
-            )
-            group_data["persons"].append(member)
-        for group_member_ref in group_data["members_groups"]:
-            group_member = next(
-                item
-                for item in data_service.groups
-                if item["Id"] == group_member_ref["Id"]
-            )
-            group_data["groups"].append(group_member)
-        group = Group(group_data, namespaces_service, top_store)
-        group.populate_graph()
-        if create_diagrams:
-            group.visualise()
-
-
-def load_access_points(create_diagrams=False):
-    print("loading access_points")
-    for access_point_data in data_service.access_points:
-        access_point = AccessPoint(
-            access_point_data, namespaces_service, top_store)
-        access_point.populate_graph()
-        if create_diagrams:
-            access_point.visualise()
-
-
-def load_digital_objects(create_diagrams=False):
-    print("loading digital objects")
-    for do_data in data_service.digital_objects:
-        do = DigitalObject(do_data, namespaces_service, top_store)
-        do.populate_graph()
-        if create_diagrams:
-            do.visualise()
-
-
-def load_services(create_diagrams=False):
-    print("loading services")
-    for service_data in data_service.services:
-        # provided by person, group, team
-        service_data["persons"] = []
-        service_data["groups"] = []
-        service_data["teams"] = []
-        service_data["digital_hosting_services"] = []
-        service_data["digital_curating_services"] = []
-        service_data["digital_objects"] = []
-        for person_ref in service_data["provided_by_person"]:
-            person = next(
-                item for item in data_service.persons if item["Id"] == person_ref["Id"]
-            )
-            service_data["persons"].append(person)
-
-        for group_ref in service_data["provided_by_group"]:
-            group = next(
-                item for item in data_service.groups if item["Id"] == group_ref["Id"]
-            )
-            service_data["groups"].append(group)
-
-        for team_ref in service_data["provided_by_team"]:
-            team = next(
-                item for item in data_service.teams if item["Id"] == team_ref["Id"]
-            )
-            service_data["teams"].append(team)
-
-        for dhs_ref in service_data["consists_of_digital_hosting_service"]:
-            dhs = next(
-                item
-                for item in data_service.digital_hosting_services
-                if item["Id"] == dhs_ref["Id"]
-            )
-            service_data["digital_hosting_services"].append(dhs)
-
-        for dcs_ref in service_data["consists_of_digital_curating_service"]:
-            dcs = next(
-                item
-                for item in data_service.digital_curating_services
-                if item["Id"] == dcs_ref["Id"]
-            )
-            service_data["digital_curating_services"].append(dcs)
-
-        for do_ref in service_data["is_referred_to_by"]:
-            do = next(
-                item
-                for item in data_service.digital_objects
-                if item["Id"] == do_ref["Id"]
-            )
-            service_data["digital_objects"].append(do)
-
-        service = Service(service_data, namespaces_service, top_store)
-        service.populate_graph()
-        if create_diagrams:
-            service.visualise()
-
-
-def load_digital_curating_services(create_diagrams=False):
-    print("loading digital curating services")
-    for dcs_data in data_service.digital_curating_services:
-        dcs_data["curates_volatile_datasets"] = []
-        dcs_data["continued_digital_curating_services"] = []
-
-        for vds_ref in dcs_data["curates"]:
-            vds = next(
-                item
-                for item in data_service.volatile_datasets
-                if item["Id"] == vds_ref["Id"]
-            )
-            dcs_data["curates_volatile_datasets"].append(vds)
-
-        for dcs_ref in dcs_data["continued"]:
-            dcs = next(
-                item
-                for item in data_service.digital_curating_services
-                if item["Id"] == dcs_ref["Id"]
-            )
-            dcs_data["continued_digital_curating_services"].append(dcs)
-
-        dcs = DigitalCuratingService(dcs_data, namespaces_service, top_store)
-        dcs.populate_graph()
-        if create_diagrams:
-            dcs.visualise()
-
-
-def load_digital_hosting_services(create_diagrams=False):
-    print("loading digital hosting services")
-    for dhs_data in data_service.digital_hosting_services:
-        dhs_data["provides_access_points"] = []
-        dhs_data["hosts_volatile_datasets"] = []
-        dhs_data["hosts_persistent_datasets"] = []
-
-        for access_point_ref in dhs_data["provides_access_point"]:
-            access_point = next(
-                item
-                for item in data_service.access_points
-                if item["Id"] == access_point_ref["Id"]
-            )
-            dhs_data["provides_access_points"].append(access_point)
-
-        for dovds_ref in dhs_data["hosts_digital_object_volatile_dataset"]:
-            dovds = next(
-                item
-                for item in data_service.volatile_datasets
-                if item["Id"] == dovds_ref["Id"]
-            )
-            dhs_data["hosts_volatile_datasets"].append(dovds)
-
-        for dopds_ref in dhs_data["hosts_digital_object_persistent_dataset"]:
-            dopds = next(
-                item
-                for item in data_service.persistent_datasets
-                if item["Id"] == dopds_ref["Id"]
-            )
-            dhs_data["hosts_persistent_datasets"].append(dopds)
-
-        dhs = DigitalHostingService(dhs_data, namespaces_service, top_store)
-        dhs.populate_graph()
-        if create_diagrams:
-            dhs.visualise()
-
-
-def load_volatile_datasets(create_diagrams=False):
-    print("loading volatile datasets")
-    for volatile_dataset_data in data_service.volatile_datasets:
-        volatile_dataset_data["accessible_at_access_points"] = []
-        volatile_dataset_data["has_persistent_dataset_snapshots"] = []
-
-        for access_point_ref in volatile_dataset_data["accessible_at"]:
-            access_point = next(
-                item
-                for item in data_service.access_points
-                if item["Id"] == access_point_ref["Id"]
-            )
-            volatile_dataset_data["accessible_at_access_points"].append(
-                access_point)
-
-        for persistent_dataset_ref in volatile_dataset_data["has_dataset_snapshot"]:
-            persistent_dataset = next(
-                item
-                for item in data_service.persistent_datasets
-                if item["Id"] == persistent_dataset_ref["Id"]
-            )
-            volatile_dataset_data["has_persistent_dataset_snapshots"].append(
-                persistent_dataset
-            )
-
-        volatile_dataset = VolatileDataset(
-            volatile_dataset_data, namespaces_service, top_store
-        )
-        volatile_dataset.populate_graph()
-        if create_diagrams:
-            volatile_dataset.visualise()
-
-
-def load_persistent_datasets(create_diagrams=False):
-    print("loading persistent datasets")
-    for persistent_dataset_data in data_service.persistent_datasets:
-        persistent_dataset_data["accessible_at_access_points"] = []
-
-        for access_point_ref in persistent_dataset_data["accessible_at"]:
-            access_point = next(
-                item
-                for item in data_service.access_points
-                if item["Id"] == access_point_ref["Id"]
+# attribute -> Ids of the rows to build, None builds every row
+build_plan = None
+
+
+def rows_to_build(attribute):
+    rows = getattr(data_service, attribute)
+    if build_plan is None:
+        return rows
+    return [row for row in rows if row["Id"] in build_plan[attribute]]
+
+
+def plan_incremental_build():
+    """
+    Load the graph of the last successful -incremental run into top_store
+    and remove the named graphs of the entities affected by the changed
+    rows. Returns attribute -> Ids of the rows to rebuild, or None if
+    everything has to be built.
+    """
+    changes = {
+        attribute: noco.changes[table_name]
+        for attribute, table_name in DataService.TABLES.items()
+    }
+    removed = {
+        attribute: set(change["previous"]) - change["updated"]
+        for attribute, change in changes.items()
+    }
+    unlinked = drop_removed_links(removed)
+    if not keep_store and not os.path.exists(GRAPH_SNAPSHOT):
+        return None
+    # namespaces go into every uri
+    if changes["namespaces"]["updated"] or changes["namespaces"]["previous"]:
+        return None
+    try:
+        with open(GRAPH_OPTIONS) as f:
+            options = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if options.get("vocab") != bool(args.vocab):
+        return None
+
+    updated = {attribute: set(change["updated"]) for attribute, change in changes.items()}
+    plan = {attribute: updated[attribute] | unlinked[attribute] for attribute in updated}
+    for source, column, target, key, output in RELATIONS:
+        for row in getattr(data_service, source):
+            # subjects of linked rows are minted from their identifiers
+            if any(ref[key] in updated[target] for ref in row[column]):
+                plan[source].add(row["Id"])
+
+    load_last_graph(GRAPH_SNAPSHOT)
+    if args.vocab:
+        # types may have been removed or renamed, load_vocabulary builds it again
+        top_store.remove_graph(namespaces_service.CKG["vocabulary"])
+    for attribute, emitter in emitters.items():
+        stale_rows = list(changes[attribute]["previous"].values())
+        stale_rows += [
+            row for row in getattr(data_service, attribute) if row["Id"] in plan[attribute]
+        ]
+        for row in stale_rows:
+            top_store.remove_graph(emitter.graph(row))
+        print(f"rebuilding {len(plan[attribute])} {attribute}")
+    return plan
+
+
+def drop_removed_links(removed):
+    """
+    Drop the links to the rows removed since the last -incremental run. The
+    snapshot of a table that did not change may still hold them, it is
+    staged again without them. Returns attribute -> Ids of the rows that
+    lost links.
+    """
+    unlinked = {attribute: set() for attribute in DataService.TABLES}
+    for source, column, target, key, output in RELATIONS:
+        if not removed[target]:
+            continue
+        for row in getattr(data_service, source):
+            refs = row[column]
+            row[column] = [ref for ref in refs if ref[key] not in removed[target]]
+            if len(row[column]) != len(refs):
+                unlinked[source].add(row["Id"])
+    for attribute, ids in unlinked.items():
+        if ids:
+            noco.restage(DataService.TABLES[attribute], getattr(data_service, attribute))
+    return unlinked
+
+
+def load_last_graph(path):
+    """The graph of the last run into top_store, parsed from path unless kept in the store."""
+    if keep_store:
+        print("starting from the graph of the last run in the store")
+        return
+    print("loading graph of the last run")
+    parse_nquads(top_store, path)
+
+
+def save_json(path, value):
+    with open(path + ".tmp", "w") as f:
+        json.dump(value, f)
+    os.replace(path + ".tmp", path)
+
+
+def save_incremental_build():
+    if STORE_RUN is not None:
+        # the store is the graph of the run, no need for a copy
+        if os.path.exists(GRAPH_SNAPSHOT):
+            os.remove(GRAPH_SNAPSHOT)
+        noco.commit_snapshots()
+        save_json(GRAPH_OPTIONS, {"vocab": bool(args.vocab)})
+        save_json(GRAPH_STORE, store_reference())
+        top_store.commit()
+        save_json(STORE_RUN, store_reference())
+        return
+    top_store.serialize(GRAPH_SNAPSHOT + ".tmp", format="nquads")
+    os.replace(GRAPH_SNAPSHOT + ".tmp", GRAPH_SNAPSHOT)
+    save_json(GRAPH_OPTIONS, {"vocab": bool(args.vocab)})
+    if os.path.exists(GRAPH_STORE):
+        os.remove(GRAPH_STORE)
+    noco.commit_snapshots()
+
+
+def entity_digests():
+    """Named graph -> digest of the rows it is built from, for every row."""
+    digests = {}
+    for attribute, emitter in emitters.items():
+        for row in getattr(data_service, attribute):
+            graph = str(emitter.graph(row))
+            # a few tables share the names of their graphs
+            digests[graph] = digests.get(graph, "") + emitter.digest(
+                row, data_service.index
             )
-            persistent_dataset_data["accessible_at_access_points"].append(
-                access_point)
-
-        persistent_dataset = PersistentDataset(
-            persistent_dataset_data, namespaces_service, top_store
+    return digests
+
+
+def plan_reuse_build(digests):
+    """
+    Load the quads of the last -reuse run into top_store and keep the named
+    graphs whose digest did not change. Returns attribute -> Ids of the rows
+    to build, or None if everything has to be built.
+    """
+    try:
+        with open(MANIFEST) as f:
+            manifest = json.load(f)
+        if not keep_store:
+            stat = os.stat(NQUADS_OUTPUT)
+    except (OSError, ValueError):
+        return None
+    # the output was written by another run, or with other options
+    if not keep_store and manifest["nquads"] != [stat.st_size, stat.st_mtime_ns]:
+        return None
+    if manifest["vocab"] != bool(args.vocab):
+        return None
+    previous = manifest["graphs"]
+    reused = {graph for graph, digest in digests.items() if previous.get(graph) == digest}
+    if not reused:
+        return None
+
+    print(f"reusing {len(reused)} of {len(digests)} named graphs of the last run")
+    load_last_graph(NQUADS_OUTPUT)
+    for context in list(top_store.contexts()):
+        if str(context.identifier) not in reused:
+            top_store.remove_graph(context)
+    plan = {}
+    for attribute, emitter in emitters.items():
+        plan[attribute] = {
+            row["Id"]
+            for row in getattr(data_service, attribute)
+            if str(emitter.graph(row)) not in reused
+        }
+        print(f"rebuilding {len(plan[attribute])} {attribute}")
+    return plan
+
+
+def save_manifest(digests):
+    manifest = {
+        "nquads": None,
+        "store": store_reference() if STORE_RUN is not None else None,
+        "vocab": bool(args.vocab),
+        "graphs": digests,
+    }
+    if os.path.exists(NQUADS_OUTPUT):
+        stat = os.stat(NQUADS_OUTPUT)
+        manifest["nquads"] = [stat.st_size, stat.st_mtime_ns]
+    save_json(MANIFEST, manifest)
+    if STORE_RUN is not None:
+        top_store.commit()
+        save_json(STORE_RUN, store_reference())
+
+
+def load_vocabulary():
+    """
+    Build the vocabulary named graph: the types of E55_Types and the types
+    the mappings of the tables with rows declare, the entities then find
+    them declared. Built again by every run, also if the other graphs are
+    those of the last run.
+    """
+    print("loading vocabulary")
+    vocabulary = quads.get_context(namespaces_service.CKG["vocabulary"])
+    pattern_builder = namespaces_service.pattern_builder
+    pattern_builder.use_vocabulary(vocabulary)
+    types = []
+    for row in data_service.types:
+        if not row["identifier"]:
+            continue
+        type_uri = namespaces_service.PDLM[f"type/{row['identifier']}"]
+        pattern_builder.declare(
+            types, vocabulary, (type_uri, pattern_builder.a, pattern_builder.E55_Type)
         )
-        persistent_dataset.populate_graph()
-        if create_diagrams:
-            persistent_dataset.visualise()
-
-
-def load_digital_machine_events(create_diagrams=False):
-    print("loading digital machine events")
-    for dme_data in data_service.digital_machine_events:
-        dme_data["was_motivated_by_projects"] = []
-        dme_data["had_input_volatile_datasets"] = []
-        dme_data["had_output_volatile_datasets"] = []
-        dme_data["had_input_persistent_datasets"] = []
-        dme_data["had_output_persistent_datasets"] = []
-        dme_data["carried_out_by_persons"] = []
-
-        # dme was motivated by project...
-        for project_ref in dme_data["was_motivated_by"]:
-            project = next(
-                item
-                for item in data_service.projects
-                if item["Id"] == project_ref["Id"]
+        if row["name"]:
+            types.append(
+                (type_uri, pattern_builder.label, Literal(row["name"]), vocabulary)
             )
-            dme_data["was_motivated_by_projects"].append(project)
-
-        # dme had input volatile dataset
-        for dataset_ref in dme_data["had_input"]:
-            dataset = next(
-                item
-                for item in data_service.volatile_datasets
-                if item["Id"] == dataset_ref["Id"]
-            )
-            dme_data["had_input_volatile_datasets"].append(dataset)
-
-        # dme had output persistent dataset
-        for dataset_ref in dme_data["had_output"]:
-            dataset = next(
-                item
-                for item in data_service.persistent_datasets
-                if item["Id"] == dataset_ref["Id"]
-            )
-            dme_data["had_output_persistent_datasets"].append(dataset)
-
-        # dme had output volatile dataset
-        for dataset_ref in dme_data["PE24_Volatile_Datasets List"]:
-            dataset = next(
-                item
-                for item in data_service.volatile_datasets
-                if item["Id"] == dataset_ref["Id"]
-            )
-            dme_data["had_output_volatile_datasets"].append(dataset)
-
-        # dme carried_out by person
-        for person_ref in dme_data["carried_out_by_person"]:
-            person = next(
-                item for item in data_service.persons if item["Id"] == person_ref["Id"]
-            )
-            dme_data["carried_out_by_persons"].append(person)
-
-        digital_machine_event = DigitalMachineEvent(
-            dme_data, namespaces_service, top_store
-        )
-        digital_machine_event.populate_graph()
+    for attribute, emitter in emitters.items():
+        if getattr(data_service, attribute):
+            for triple in emitter.declarations:
+                pattern_builder.declare(types, vocabulary, triple)
+    quads.addN(types)
+
+
+def load_entities(attribute, create_diagrams=False):
+    print(f"loading {attribute.replace('_', ' ')}")
+    build_entities(attribute, rows_to_build(attribute), quads, create_diagrams)
+
+
+def build_entities(attribute, rows, sink, create_diagrams=False):
+    emitter = emitters[attribute]
+    emit = emitter.emit
+    entity_quads = []
+    n_rows = n_quads = 0
+    for row in rows:
+        graph = sink.get_context(emitter.graph(row))
+        emit(row, graph, entity_quads)
+        sink.addN(entity_quads)
+        n_rows += 1
+        n_quads += len(entity_quads)
         if create_diagrams:
-            digital_machine_event.visualise()
-
-
-def load_topics(create_diagrams=False):
-    print("loading topics")
-    for topic_data in data_service.topics:
-        topic = Topic(topic_data, namespaces_service, top_store)
-        topic.populate_graph()
-        if create_diagrams:
-            topic.visualise()
-
-
-def load_projects(create_diagrams=False):
-    print("loading projects")
-    for project_data in data_service.projects:
-        project_data["supported_projects"] = []
-        project_data["has_maintaining_teams"] = []
-        project_data["has_topics"] = []
-
-        # project has topics (only one atm)
-        # name of the relation is some weird nocodb convention
-        for topic_ref in project_data["nc_j8_t___nc_m2m__eofowxvl5s"]:
-            topic = next(
-                item
-                for item in data_service.topics
-                if item["Id"] == topic_ref["table2_id"]
+            diagram = Graph()
+            for s, p, o, g in entity_quads:
+                if g is graph:
+                    diagram.add((s, p, o))
+            visualise(diagram, emitter.subject_string(row))
+        entity_quads.clear()
+    measure(rows=n_rows, quads=n_quads)
+    return n_quads
+
+
+def load_entities_parallel(workers, create_diagrams=False):
+    """
+    Build the entities in a pool of forked processes: each writes a share of
+    the rows to an n-quads shard that is then appended to the output.
+    """
+    tasks = []
+    for attribute in MAPPINGS:
+        ids = [row["Id"] for row in rows_to_build(attribute)]
+        # a few shards per worker, so that they finish at about the same time
+        shard_size = max(1, len(ids) // (workers * 4) + 1)
+        for start in range(0, len(ids), shard_size):
+            tasks.append((attribute, ids[start : start + shard_size]))
+    print(f"loading entities in {len(tasks)} shards with {workers} workers")
+
+    with tempfile.TemporaryDirectory() as shard_dir:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            shards = executor.map(
+                build_shard,
+                [
+                    (shard_dir, i, attribute, ids, create_diagrams)
+                    for i, (attribute, ids) in enumerate(tasks)
+                ],
             )
-            project_data["has_topics"].append(topic)
-
-        # project has maintaining teams
-        for team_ref in project_data["teams"]:
-            team = next(
-                item for item in data_service.teams if item["Id"] == team_ref["Id"]
-            )
-            project_data["has_maintaining_teams"].append(team)
-
-        # project supported project
-        for project_ref in project_data["supported_project_activity"]:
-            project = next(
-                item
-                for item in data_service.projects
-                if item["Id"] == project_ref["Id"]
-            )
-            project_data["supported_projects"].append(project)
-
-        project = Project(project_data, namespaces_service, top_store)
-        project.populate_graph()
-        if create_diagrams:
-            project.visualise()
+            for shard, n_quads in shards:
+                quads.append(shard)
+                measure(quads=n_quads)
+    measure(rows=sum(len(ids) for _, ids in tasks))
+
+
+def build_shard(task):
+    """
+    Worker of load_entities_parallel, returns the path of its shard and the
+    number of quads in it.
+    """
+    shard_dir, index, attribute, ids, create_diagrams = task
+    path = os.path.join(shard_dir, f"{index}.nq")
+    # the fork has the vocabulary graph and the types load_vocabulary declared
+    sink = NQuadsWriter(path)
+    rows = [data_service.lookup(attribute, row_id) for row_id in ids]
+    n_quads = build_entities(attribute, rows, sink, create_diagrams)
+    sink.close()
+    return path, n_quads
 
 
 def test_all(graph):
@@ -493,43 +675,198 @@ def test_all(graph):
         TESTREPORT_DIR, exist_ok=True
     )
 
-    ActorTests(graph, noco, report_dir=TESTREPORT_DIR).test_all("actors.txt")
-    ActivitieTests(graph, noco, report_dir=TESTREPORT_DIR).test_all(
-        "activities.txt")
-    DigitalObjectTests(graph, noco, report_dir=TESTREPORT_DIR).test_all(
-        "digitalObects.txt")
+    with timed("actors"):
+        ActorTests(graph, noco, report_dir=TESTREPORT_DIR).test_all("actors.txt")
+    with timed("activities"):
+        ActivitieTests(graph, noco, report_dir=TESTREPORT_DIR).test_all(
+            "activities.txt")
+    with timed("digital objects"):
+        DigitalObjectTests(graph, noco, report_dir=TESTREPORT_DIR).test_all(
+            "digitalObects.txt")
+
+
+def plan_incremental():
+    global build_plan
+    build_plan = plan_incremental_build()
+    if build_plan is None and keep_store:
+        clear_dataset(top_store)
+    noco.stage_snapshots()
+
+
+def plan_reuse():
+    """Returns the digests of the named graphs, for save_manifest."""
+    global build_plan
+    digests = entity_digests()
+    build_plan = plan_reuse_build(digests)
+    if build_plan is None and keep_store:
+        clear_dataset(top_store)
+    return digests
+
+
+def resolve():
+    print("resolving relations")
+    n_links = resolve_relations(data_service)
+    measure(
+        rows=sum(len(getattr(data_service, attribute)) for attribute in DataService.TABLES),
+        links=n_links,
+    )
+    return n_links
 
 
-def main():
-    load_persons(args.d)
-    load_teams(args.d)
-    load_groups(args.d)
-    load_access_points(args.d)
-    load_services(args.d)
-    load_digital_objects(args.d)
-    load_digital_hosting_services(args.d)
-    load_digital_curating_services(args.d)
-    load_volatile_datasets(args.d)
-    load_persistent_datasets(args.d)
-    load_digital_machine_events(args.d)
-    load_topics(args.d)
-    load_projects(args.d)
+def finish_graph():
+    if args.stream:
+        quads.close()
+    else:
+        quads.flush()
     # optional: last param for overall graph constructor is url of remote, defaults to http://localhost
-    overall_graph = OverallGraph(
+    return OverallGraph(
         top_store,
         namespaces_service.namespaces,
         {"username": args.u, "password": args.p},
         args.url,
+        transport=transport,
+        gzip_push=args.gzip_push,
+        nquads=NQUADS_OUTPUT if args.stream else None,
+        formats=args.formats,
     )
-    if args.t:
-        test_all(overall_graph)
 
-    overall_graph.serialize()
+
+def run_tests(stages):
+    if args.stream:
+        # the tests query the whole graph, read it back from the output
+        parse_nquads(top_store, NQUADS_OUTPUT)
+    test_all(stages.results["graph"])
+
+
+def push(stages):
     # push to remove and purge should be args?
     # I assume every time one pushes, one would purge as well, but maybe not!
+    with timed("purge"):
+        stages.results["graph"].purge_remote()
+    with timed("push"):
+        stages.results["graph"].push_to_remote()
+
+
+def build_stages():
+    """
+    The stages of the run: every table only needs the resolved rows (and the
+    vocabulary), its graphs are built independently of the others.
+    """
+    stages = Stages(PROFILE_DIR if args.pstats else None, memory=args.memory)
+    if args.incremental:
+        # the plan reads the rows before the relations are resolved
+        stages.add("plan", plan_incremental)
+    stages.add("relations", resolve, stages.names())
+    entity_inputs = ["relations"]
+    if args.reuse:
+        stages.add("plan", plan_reuse, ["relations"])
+        entity_inputs.append("plan")
+    if args.vocab:
+        # after the plan loaded the graph of the last run, without its vocabulary
+        vocabulary_inputs = ["plan"] if args.incremental or args.reuse else []
+        stages.add("vocabulary", load_vocabulary, vocabulary_inputs)
+        entity_inputs.append("vocabulary")
+    if args.workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        stages.add(
+            "entities",
+            partial(load_entities_parallel, args.workers, args.d),
+            entity_inputs,
+        )
+        built = ["entities"]
+    else:
+        for attribute in MAPPINGS:
+            stages.add(attribute, partial(load_entities, attribute, args.d), entity_inputs)
+        built = list(MAPPINGS)
+    stages.add("graph", finish_graph, built)
+    serialize_inputs = ["graph"]
+    if args.t:
+        # the tests and the serializations both read the whole store
+        stages.add("tests", partial(run_tests, stages), ["graph"])
+        serialize_inputs = ["tests"]
+    stages.add("serialize", lambda: stages.results["graph"].serialize(), serialize_inputs)
+    if args.reuse:
+        stages.add(
+            "manifest", lambda: save_manifest(stages.results["plan"]), ["serialize"]
+        )
+    saved_inputs = ["serialize"]
     if args.push:
-        overall_graph.purge_remote()
-        overall_graph.push_to_remote()
+        stages.add("push", partial(push, stages), ["serialize"])
+        saved_inputs = ["push"]
+    if args.incremental:
+        stages.add("incremental snapshot", save_incremental_build, saved_inputs)
+    return stages
+
+
+def store_memory(stages):
+    """
+    Memory of the fetch and the store: what the building stages retained,
+    per quad of the store.
+    """
+    built = [
+        name for name in stages.names() if name in MAPPINGS or name == "entities"
+    ]
+    quads_in_store = sum(1 for _ in top_store.quads())
+    store_bytes = (
+        stages.metrics["graph"]["memory"]["traced_after"]
+        - min(stages.metrics[name]["memory"]["traced_before"] for name in built)
+    )
+    return {
+        "fetch": {
+            "retained": fetch_memory["traced"],
+            "peak": fetch_memory["traced_peak"],
+            "rss": fetch_memory.get("rss"),
+        },
+        "store": {
+            "quads": quads_in_store,
+            "bytes": store_bytes,
+            "bytes_per_quad": store_bytes / quads_in_store if quads_in_store else None,
+        },
+    }
+
+
+def report_memory(memory):
+    fetch, store = memory["fetch"], memory["store"]
+    print(
+        f"fetched rows: {fetch['retained'] / 2**20:.1f} MB retained,"
+        f" {fetch['peak'] / 2**20:.1f} MB peak"
+    )
+    if store["bytes_per_quad"] is not None:
+        print(
+            f"store: {store['quads']} quads in {store['bytes'] / 2**20:.1f} MB,"
+            f" {store['bytes_per_quad']:.0f} bytes per quad"
+        )
+
+
+def save_metrics(stages, memory=None):
+    metrics = stages.summary()
+    if memory is not None:
+        metrics["memory"] = memory
+    metrics["fetch"] = {
+        table_name: {
+            "wall_s": seconds,
+            "rows": n_rows,
+            "rows_per_s": n_rows / seconds if seconds else None,
+            "source": noco.sources.get(table_name),
+        }
+        for table_name, (seconds, n_rows) in noco.fetch_stats.items()
+    }
+    os.makedirs(os.path.dirname(METRICS), exist_ok=True)
+    with open(METRICS, "w") as f:
+        json.dump(metrics, f, indent=2)
+    print(f"metrics written to {METRICS}")
+
+
+def main():
+    stages = build_stages()
+    stages.run(args.stage_workers)
+    # the store is counted while it is still open
+    memory = store_memory(stages) if args.memory else None
+    top_store.close()
+    stages.report()
+    if memory is not None:
+        report_memory(memory)
+    if args.profile:
+        save_metrics(stages, memory)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,259 @@
+"""
+Benchmarks of the ingest pipeline at several dataset sizes, kept to compare
+runs over time:
+
+    python -m ingestor_code.benchmark [-sizes 1000 10000 100000] [-name label]
+    python -m ingestor_code.benchmark -compare [RUN [RUN]]
+
+For every size (number of persons) synthetic tables are generated once into
+output/benchmark/fixtures/<size>-<fanout>/ (see synthetic.py) and the ingestor is run
+on them with -offline -profile in a directory of its own: the fetch from the
+snapshots, the relations, the graph of every table, OverallGraph and each
+output format are read from its metrics.json. rdf2nx and the data_test
+queries are then timed on its output. Each run is stored in
+output/benchmark/runs/; -compare prints the change of every measurement
+between two of them, the last two by default.
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from rdflib import ConjunctiveGraph
+from .drih_utils import rdf2nx
+from .drih_utils.nquads import parse_nquads
+from .drih_utils.store_benchmark import data_test_queries
+from .synthetic import generate
+
+BENCHMARK_DIR = "output/benchmark/"
+SIZES = [1000, 10000, 100000]
+# slower by more than this is reported as a regression
+THRESHOLD = 0.1
+# changes of less seconds are noise
+MIN_SECONDS = 0.05
+
+
+def fixture(size, fanout):
+    """Snapshot cache of the synthetic tables of size, generated once."""
+    cache_dir = os.path.join(BENCHMARK_DIR, "fixtures", f"{size}-{fanout}")
+    if not os.path.exists(os.path.join(cache_dir, "Meta_Namespaces.jsonl.gz")):
+        print(f"generating the fixture of {size} persons")
+        generate(cache_dir, size, fanout)
+    return os.path.abspath(cache_dir)
+
+
+def ingest(cache_dir, ingestor_args):
+    """
+    Run the ingestor on cache_dir in a temporary directory, returns its
+    metrics and its n-quads output.
+    """
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [package_root, env.get("PYTHONPATH")])
+    )
+    with tempfile.TemporaryDirectory() as run_dir:
+        subprocess.run(
+            [sys.executable, "-m", "ingestor_code", "-offline", "-profile"]
+            + ["-cache_dir", cache_dir]
+            + ingestor_args,
+            cwd=run_dir,
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        with open(os.path.join(run_dir, "output/metrics.json")) as f:
+            metrics = json.load(f)
+        with open(os.path.join(run_dir, "output/rdf/overall_nquads.txt"), "rb") as f:
+            nquads = f.read()
+    return metrics, nquads
+
+
+def pipeline_timings(metrics):
+    """measurement -> seconds of the stages of an ingestor run."""
+    stages = metrics["stages"]
+    timings = {"fetch": sum(table["wall_s"] for table in metrics["fetch"].values())}
+    for name, stage in stages.items():
+        if name in ("relations", "graph", "tests"):
+            timings[name] = stage["wall_s"]
+        elif "quads" in stage:
+            timings["build/" + name] = stage["wall_s"]
+    timings["build"] = sum(
+        seconds for name, seconds in timings.items() if name.startswith("build/")
+    )
+    for part, part_metrics in stages["serialize"].get("parts", {}).items():
+        timings["serialize/" + part] = part_metrics["wall_s"]
+    timings["serialize"] = stages["serialize"]["wall_s"]
+    timings["total"] = metrics["total_s"]
+    return timings
+
+
+def graph_timings(nquads, cache_dir):
+    """measurement -> seconds of rdf2nx and the data_test queries."""
+    import practicalSPARQL
+
+    graph = parse_nquads(ConjunctiveGraph(), io.BytesIO(nquads))
+    timings = {}
+
+    start = time.perf_counter()
+    rdf2nx(graph)
+    timings["rdf2nx"] = time.perf_counter() - start
+
+    # as data_test does: the trig of the store parsed into a practicalSPARQL
+    # graph, queried into dataframes
+    start = time.perf_counter()
+    test_graph = practicalSPARQL.rdfGRAPH()
+    test_graph.parse(data=graph.serialize(format="trig"), format="trig")
+    timings["data_test/load"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for query in data_test_queries(cache_dir):
+        test_graph.select_as_dataframe(query)
+    timings["data_test/queries"] = time.perf_counter() - start
+    return timings, len(graph)
+
+
+def run_benchmarks(sizes, fanout, repeat, ingestor_args):
+    """size -> measurement -> seconds, the best of repeat runs."""
+    results = {}
+    for size in sizes:
+        cache_dir = fixture(size, fanout)
+        best = {}
+        for i in range(repeat):
+            print(f"benchmarking {size} persons ({i + 1}/{repeat})")
+            metrics, nquads = ingest(cache_dir, ingestor_args)
+            timings = pipeline_timings(metrics)
+            graph, triples = graph_timings(nquads, cache_dir)
+            timings.update(graph)
+            for name, seconds in timings.items():
+                best[name] = min(best.get(name, seconds), seconds)
+        best["triples"] = triples
+        results[str(size)] = best
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_run(results, name, args):
+    runs_dir = os.path.join(BENCHMARK_DIR, "runs")
+    os.makedirs(runs_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    path = os.path.join(runs_dir, f"{stamp}-{name}.json" if name else f"{stamp}.json")
+    run = {
+        "name": name,
+        "time": stamp,
+        "commit": git_commit(),
+        "fanout": args.fanout,
+        "ingestor_args": args.args,
+        "sizes": results,
+    }
+    with open(path, "w") as f:
+        json.dump(run, f, indent=2)
+    print(f"results written to {path}")
+    return path
+
+
+def print_results(results):
+    for size, timings in results.items():
+        print(f"{size} persons, {timings['triples']} triples:")
+        for name, seconds in timings.items():
+            if name != "triples":
+                print(f"  {name:<40} {seconds:9.3f}s")
+
+
+def compare(before_path, after_path, threshold=THRESHOLD):
+    """Print the change of every measurement, returns the regressions."""
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{before_path} ({before['commit']}) -> {after_path} ({after['commit']})")
+    regressions = []
+    for size, timings in after["sizes"].items():
+        if size not in before["sizes"]:
+            continue
+        print(f"{size} persons:")
+        for name, seconds in timings.items():
+            previous = before["sizes"][size].get(name)
+            if name == "triples" or not previous:
+                continue
+            change = seconds / previous - 1
+            flag = ""
+            if abs(seconds - previous) < MIN_SECONDS:
+                pass
+            elif change > threshold:
+                flag = "  slower"
+                regressions.append((size, name, change))
+            elif change < -threshold:
+                flag = "  faster"
+            print(f"  {name:<40} {previous:9.3f}s {seconds:9.3f}s {change:+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "-sizes",
+        help=f"numbers of persons to benchmark (default: {' '.join(map(str, SIZES))})",
+        type=int,
+        nargs="+",
+        default=SIZES,
+    )
+    parser.add_argument(
+        "-fanout", help="links per link column of the fixtures (default: 2)", type=int, default=2
+    )
+    parser.add_argument(
+        "-repeat", help="runs per size, the best is kept (default: 1)", type=int, default=1
+    )
+    parser.add_argument("-name", help="label of the stored run", default="")
+    parser.add_argument(
+        "-args",
+        help='more options of the ingestor, e.g. -args="-stream -workers 4"',
+        default="",
+    )
+    parser.add_argument(
+        "-compare",
+        help="compare two stored runs (default: the last two) instead of benchmarking",
+        nargs="*",
+        default=None,
+    )
+    parser.add_argument(
+        "-threshold",
+        help=f"relative change reported as slower or faster (default: {THRESHOLD})",
+        type=float,
+        default=THRESHOLD,
+    )
+    args = parser.parse_args()
+
+    if args.compare is not None:
+        runs = args.compare or sorted(
+            glob.glob(os.path.join(BENCHMARK_DIR, "runs", "*.json"))
+        )[-2:]
+        if len(runs) != 2:
+            parser.error("-compare needs two runs")
+        regressions = compare(*runs, threshold=args.threshold)
+        if regressions:
+            raise SystemExit(f"{len(regressions)} measurements slower")
+        return
+
+    results = run_benchmarks(args.sizes, args.fanout, args.repeat, args.args.split())
+    print_results(results)
+    save_run(results, args.name, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,54 +2,348 @@ import rdflib
 import networkx as nx
 import dotenv
 import os
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
 from nocodb.nocodb import NocoDBProject, APIToken, JWTAuthToken
-from nocodb.filters import EqFilter, LikeFilter
+from nocodb.filters import EqFilter, LikeFilter, GreaterOrEqualFilter
 from nocodb.infra.requests_client import NocoDBRequestsClient
+from nocodb.exceptions import NocoDBAPIError
 from dotenv import load_dotenv, find_dotenv
 
+from .cache import SnapshotCache
+from .quad_buffer import QuadBuffer
+from .sqlite_store import SQLiteStore
+from .stores import STORES, clear_dataset, open_dataset
+from .transport import Transport
+
 load_dotenv(find_dotenv())
 
 
+class NocoClient(NocoDBRequestsClient):
+    """
+    NocoDBRequestsClient sending its requests through a (shared) Transport
+    instead of its own bare session.
+    """
+
+    def __init__(self, auth_token, base_uri, transport):
+        super().__init__(auth_token, base_uri)
+        self.transport = transport
+        # sent per request, the transport's session is shared with other hosts
+        self.headers = {**auth_token.get_header(), "Content-Type": "application/json"}
+
+    def _request(self, method, url, *args, **kwargs):
+        kwargs["headers"] = {**self.headers, **(kwargs.get("headers") or {})}
+        response = self.transport.request(method, url, *args, **kwargs)
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as http_error:
+            try:
+                response_json = response.json()
+            except requests.exceptions.JSONDecodeError:
+                response_json = None
+            raise NocoDBAPIError(
+                message=str(http_error),
+                status_code=http_error.response.status_code,
+                response_json=response_json,
+                response_text=response.text,
+            )
+        return response
+
+
 class noco:
     """
     Class to pull data from nocodb
     """
 
-    def __init__(self):
-        self.client = NocoDBRequestsClient(
+    # nocodb caps the page size server side (1000 rows by default)
+    PAGE_SIZE = 1000
+
+    def __init__(
+        self,
+        page_size=PAGE_SIZE,
+        max_workers=1,
+        cache=None,
+        offline=False,
+        incremental=False,
+        transport=None,
+    ):
+        # share the connection pool between concurrent fetches
+        self.transport = transport or Transport(pool_size=max_workers)
+        self.client = NocoClient(
             # Your API Token retrieved from NocoDB conf
             APIToken(os.getenv("NOCODB_TOKEN")),
             # Your nocodb root path
             "http://nocodb.mpiwg-berlin.mpg.de",
+            self.transport,
         )
         self.project = NocoDBProject(
             "noco",  # org name. noco by default
             "DRIH_PRODUCTION",  # project name. Case sensitive!!
         )
+        self.page_size = page_size
+        self.max_workers = max_workers
+        # optional SnapshotCache, offline runs are served from it alone
+        self.cache = cache
+        self.offline = offline
+        # incremental: only fetch the rows changed since the snapshot and
+        # hold back the new snapshots until commit_snapshots()
+        self.incremental = incremental
+        if (self.offline or self.incremental) and self.cache is None:
+            raise ValueError("offline and incremental modes require a snapshot cache")
+        # table_name -> {"updated": Ids, "previous": {Id: row before the change}}
+        # for the rows that changed since the last committed snapshot
+        self.changes = {}
+        self.pending = {}
+        self.staged = []
+        # table_name -> (seconds, number of rows) of the last fetch
+        self.fetch_stats = {}
+        # table_name -> "nocodb" or "cache", where the rows came from
+        self.sources = {}
 
-    def get_rows(self, table_name):
-        rows = self.client.table_row_list(
-            self.project, table_name, params={"limit": 10000}
-        )
-        # filter non-empty records (require identifier)
-        if "identifier" in rows["list"][0]:
-            filtered_list = list(
-                filter(lambda row: row["identifier"] != None, rows["list"])
+    def row_batches(
+        self, table_name, page_size=None, filter_obj=None, params=None, filter_empty=True
+    ):
+        """
+        Generator yielding the rows of table_name page by page, following the
+        pageInfo (offset/isLastPage) returned by nocodb. Empty records
+        (without identifier) are filtered out of every page unless
+        filter_empty is False.
+        """
+        page_size = page_size or self.page_size
+        offset = 0
+        removed = 0
+        while True:
+            rows = self.client.table_row_list(
+                self.project,
+                table_name,
+                filter_obj,
+                params={**(params or {}), "limit": page_size, "offset": offset},
             )
-            if 0 != (n := (len(rows["list"])) - len(filtered_list)):
-                print(f"removed {n} empty records from table {table_name}")
-            return filtered_list
+            page = rows["list"]
+            # filter non-empty records (require identifier)
+            if filter_empty and page and "identifier" in page[0]:
+                batch = [row for row in page if row["identifier"] != None]
+                removed += len(page) - len(batch)
+            else:
+                # skip if there is no identifier column
+                batch = page
+            if batch:
+                yield batch
+            # the server may return less than page_size rows, so advance by
+            # what was actually received
+            offset += len(page)
+            if not page or rows.get("pageInfo", {}).get("isLastPage", True):
+                break
+        if removed != 0:
+            print(f"removed {removed} empty records from table {table_name}")
+
+    def get_rows(self, table_name, page_size=None, fields=None):
+        """
+        All non-empty rows of table_name. fields restricts the columns that
+        are downloaded, None downloads every column.
+        """
+        if self.cache is None:
+            self.sources[table_name] = "nocodb"
+            return self.fetch_rows(table_name, page_size, fields)
+        if self.offline:
+            self.sources[table_name] = "cache"
+            self.changes[table_name] = {"updated": set(), "previous": {}}
+            return self.cached_rows(table_name)
+
+        # only download the table again if it changed since the snapshot
+        state = self.table_state(table_name)
+        if state is not None:
+            # the snapshot is only usable if it holds the same columns
+            state["fields"] = fields
+        if state is not None and self.cache.has(table_name):
+            # None if nocodb could not provide it when the snapshot was taken
+            cached_state = self.cache.state(table_name)
+            if cached_state == state:
+                self.sources[table_name] = "cache"
+                self.changes[table_name] = {"updated": set(), "previous": {}}
+                return self.cache.load(table_name)
+            if (
+                self.incremental
+                and cached_state is not None
+                and cached_state.get("updated_at")
+                and cached_state.get("fields") == fields
+            ):
+                self.sources[table_name] = "delta"
+                rows = self.fetch_delta(table_name, page_size, fields)
+                self.pending[table_name] = (rows, state)
+                return rows
+
+        self.sources[table_name] = "nocodb"
+        rows = self.fetch_rows(table_name, page_size, fields)
+        if self.incremental:
+            # without a usable snapshot every row counts as changed
+            previous = {}
+            if self.cache.has(table_name):
+                previous = {row["Id"]: row for row in self.cache.load(table_name)}
+            self.changes[table_name] = {
+                "updated": {row["Id"] for row in rows},
+                "previous": previous,
+            }
+            self.pending[table_name] = (rows, state)
         else:
-            # skip if there is no identifier column
-            return rows["list"]
+            self.cache.store(table_name, rows, state)
+        return rows
+
+    def fetch_rows(self, table_name, page_size=None, fields=None):
+        rows = []
+        for batch in self.row_batches(
+            table_name, page_size, params=self.fields_params(fields)
+        ):
+            rows.extend(batch)
+        return rows
+
+    def fields_params(self, fields):
+        if fields is None:
+            return None
+        return {"fields": ",".join(fields)}
+
+    def fetch_delta(self, table_name, page_size=None, fields=None):
+        """
+        Bring the snapshot of table_name up to date: fetch the rows updated
+        since its high-water mark (the max UpdatedAt of the snapshot) and
+        drop the rows deleted since, found with an Id-only listing.
+        """
+        rows = {row["Id"]: row for row in self.cache.load(table_name)}
+        high_water_mark = self.cache.state(table_name)["updated_at"]
+        updated = set()
+        previous = {}
+
+        # ge rather than gt, rows updated within the same second as the
+        # high-water mark must not be missed
+        for batch in self.row_batches(
+            table_name,
+            page_size,
+            GreaterOrEqualFilter("UpdatedAt", high_water_mark),
+            params=self.fields_params(fields),
+            filter_empty=False,
+        ):
+            for row in batch:
+                # fetched again for sharing the second of the high-water mark
+                if rows.get(row["Id"]) == row:
+                    continue
+                if row["Id"] in rows:
+                    previous[row["Id"]] = rows.pop(row["Id"])
+                # rows whose identifier was emptied are gone for good
+                if row.get("identifier", True) != None:
+                    rows[row["Id"]] = row
+                    updated.add(row["Id"])
+
+        live_ids = set()
+        for batch in self.row_batches(
+            table_name, page_size, params={"fields": "Id"}, filter_empty=False
+        ):
+            live_ids.update(row["Id"] for row in batch)
+        for row_id in [row_id for row_id in rows if row_id not in live_ids]:
+            previous[row_id] = rows.pop(row_id)
+            updated.discard(row_id)
+
+        print(
+            f"{table_name}: {len(updated)} rows updated,"
+            f" {len(set(previous) - updated)} removed"
+        )
+        self.changes[table_name] = {"updated": updated, "previous": previous}
+        return list(rows.values())
+
+    def stage_snapshots(self):
+        """
+        Write the snapshots fetched in incremental mode next to the current
+        ones, they only replace them once commit_snapshots() is called.
+        """
+        for table_name, (rows, state) in self.pending.items():
+            self.cache.stage(table_name, rows, state)
+        self.staged = list(self.pending)
+        self.pending = {}
+
+    def restage(self, table_name, rows):
+        """
+        Snapshot the rows of table_name with the other incremental ones,
+        also if it was read from its unchanged snapshot.
+        """
+        if table_name not in self.pending:
+            self.pending[table_name] = (rows, self.cache.state(table_name))
+
+    def commit_snapshots(self):
+        for table_name in self.staged:
+            self.cache.commit(table_name)
+        self.staged = []
+
+    def cached_rows(self, key):
+        if not self.cache.has(key):
+            raise SystemExit(
+                f"offline: no snapshot of {key} in {self.cache.cache_dir}"
+            )
+        return self.cache.load(key)
+
+    def table_state(self, table_name):
+        """
+        Cheap fingerprint of a table: its row count and the most recent
+        UpdatedAt. Returns None if nocodb cannot provide it.
+        """
+        try:
+            count = self.client.table_count(self.project, table_name)["count"]
+            latest = self.client.table_row_list(
+                self.project,
+                table_name,
+                params={"sort": "-UpdatedAt", "fields": "UpdatedAt", "limit": 1},
+            )["list"]
+        except NocoDBAPIError:
+            return None
+        return {
+            "count": count,
+            "updated_at": latest[0].get("UpdatedAt") if latest else None,
+        }
+
+    def get_tables(self, table_names, max_workers=None, fields=None):
+        """
+        Fetch several tables, at most max_workers of them concurrently.
+        fields optionally maps table names to the columns to download.
+        Every table is fetched once, returns a dict table_name -> rows.
+        """
+        table_names = list(dict.fromkeys(table_names))
+        max_workers = max_workers or self.max_workers
+        fields = fields or {}
+
+        def fetch(table_name):
+            start = time.perf_counter()
+            rows = self.get_rows(table_name, fields=fields.get(table_name))
+            self.fetch_stats[table_name] = (time.perf_counter() - start, len(rows))
+            return rows
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            tables = dict(zip(table_names, executor.map(fetch, table_names)))
+        self.report_fetch(table_names, time.perf_counter() - start)
+        return tables
+
+    def report_fetch(self, table_names, wall_time):
+        print(f"fetched {len(table_names)} tables in {wall_time:.2f}s")
+        for table_name in sorted(
+            table_names, key=lambda name: self.fetch_stats[name][0], reverse=True
+        ):
+            seconds, n_rows = self.fetch_stats[table_name]
+            print(
+                f"  {table_name:<32} {n_rows:>7} rows {seconds:>8.2f}s"
+                f" ({self.sources[table_name]})"
+            )
 
     # TODO make sure that the correct nocodb table is referenced here. Still testing phase so table is changing!
     def get_tests(self, test_class: str):
         """Test class is the name of entry corresponding to the
         test_class col in the Meta_Tests table"""
+        key = f"test_dev_v3.{test_class}"
+        if self.offline:
+            return self.cached_rows(key)
         tests = self.client.table_row_list(
             self.project, "test_dev_v3", LikeFilter("test_class", test_class)
         )
+        if self.cache is not None:
+            self.cache.store(key, tests["list"])
         return tests["list"]
 
     def from_list(self, list_name, key, value):
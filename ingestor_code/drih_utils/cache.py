@@ -0,0 +1,54 @@
+import gzip
+import json
+import os
+
+
+class SnapshotCache:
+    """
+    On-disk snapshots of nocodb tables, one gzipped json lines file per table
+    plus a small json file holding the state (row count, max UpdatedAt) of the
+    table at the time the snapshot was taken.
+    """
+
+    CACHE_DIR = "output/cache/"
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def rows_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.jsonl.gz")
+
+    def state_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def has(self, key):
+        return os.path.exists(self.rows_path(key))
+
+    def state(self, key):
+        if not os.path.exists(self.state_path(key)):
+            return None
+        with open(self.state_path(key)) as f:
+            return json.load(f)
+
+    def load(self, key):
+        with gzip.open(self.rows_path(key), "rt", encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+
+    def store(self, key, rows, state=None):
+        self.stage(key, rows, state)
+        self.commit(key)
+
+    def stage(self, key, rows, state=None):
+        # write to temporary files first so an interrupted run never leaves a
+        # truncated snapshot behind
+        with gzip.open(self.rows_path(key) + ".tmp", "wt", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False))
+                f.write("\n")
+        with open(self.state_path(key) + ".tmp", "w") as f:
+            json.dump(state, f)
+
+    def commit(self, key):
+        os.replace(self.rows_path(key) + ".tmp", self.rows_path(key))
+        os.replace(self.state_path(key) + ".tmp", self.state_path(key))
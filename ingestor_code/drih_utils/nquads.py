@@ -0,0 +1,187 @@
+import os
+import re
+import threading
+from rdflib import RDF, URIRef
+from rdflib.parser import create_input_source
+from rdflib.plugins.parsers.nquads import NQuadsParser
+from rdflib.plugins.parsers.ntriples import unquote, uriquote
+from rdflib.plugins.serializers.nquads import _nq_row
+
+# some uris are minted relative (e.g. "actor/person/<pid>/name/"), rdflib writes
+# them to n-quads as they are but its parser only accepts absolute uris
+r_uriref = re.compile(r'<([^\s"<>]*)>')
+# a line of n-quads written by rdflib or NQuadsWriter: triple, graph uri
+r_quad = re.compile(r"^(.*) (<[^\s\"<>]*>) \.\s*$")
+# local names written as prefix:name, the others stay full uris
+r_local_name = re.compile(r"^[A-Za-z0-9_](?:[A-Za-z0-9_.\-]*[A-Za-z0-9_\-])?$")
+
+
+class RelativeNQuadsParser(NQuadsParser):
+    """N-Quads parser that also accepts relative uris."""
+
+    def uriref(self):
+        if self.peek("<"):
+            return URIRef(uriquote(unquote(self.eat(r_uriref).group(1))))
+        return False
+
+
+def parse_nquads(store, source):
+    """Load the n-quads file (path or binary file object) into store."""
+    RelativeNQuadsParser().parse(create_input_source(source=source), store)
+    return store
+
+
+class NQuadsWriter:
+    """
+    Stands in for the dataset like QuadBuffer, but writes the quads straight
+    to an n-quads file instead of keeping them: contexts are plain graph
+    uris. The file is written to path + ".tmp" and moved to path by close(),
+    so that an interrupted run never leaves half of it behind. The lines of
+    unique_graphs (e.g. the vocabulary) appended from other files are written
+    once. Stages running in threads can share it.
+    """
+
+    def __init__(self, path, unique_graphs=()):
+        self.path = path
+        self.file = open(path + ".tmp", "w", encoding="utf-8")
+        self.unique_graphs = [f" {graph.n3()} .\n" for graph in unique_graphs]
+        self.unique_lines = set()
+        self.lock = threading.Lock()
+
+    def get_context(self, identifier):
+        return identifier
+
+    def add(self, quad):
+        self.addN([quad])
+
+    def addN(self, quads):
+        lines = [_nq_row(quad[:3], quad[3]) for quad in quads]
+        with self.lock:
+            self.file.writelines(lines)
+
+    def append(self, path):
+        """Append the lines of the n-quads file path, e.g. a shard."""
+        with open(path, encoding="utf-8") as f, self.lock:
+            for line in f:
+                if not line.strip():
+                    continue
+                if any(line.endswith(graph) for graph in self.unique_graphs):
+                    if line in self.unique_lines:
+                        continue
+                    self.unique_lines.add(line)
+                self.file.write(line)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+        os.replace(self.path + ".tmp", self.path)
+
+
+def graph_blocks(path):
+    """(graph, lines of its triples) of the n-quads file path, run by run."""
+    graph, lines = None, []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            match = r_quad.match(line)
+            if match is None:
+                continue
+            if match.group(2) != graph:
+                if lines:
+                    yield graph, lines
+                graph, lines = match.group(2), []
+            lines.append(match.group(1))
+    if lines:
+        yield graph, lines
+
+
+class Compactor:
+    """
+    Writes the n-quads terms as turtle and trig with the prefixes of
+    namespaces (prefix -> namespace uri): prefix:name for the uris of a
+    namespace, a for rdf:type, the triples of a subject joined with ; and
+    its objects of a predicate with ,.
+    """
+
+    def __init__(self, namespaces):
+        self.prefixes = {str(uri): prefix for prefix, uri in namespaces.items()}
+        self.names = {}
+        self.rdf_type = f"<{RDF.type}>"
+
+    def header(self):
+        return "".join(
+            f"@prefix {prefix}: <{uri}> .\n" for uri, prefix in self.prefixes.items()
+        ) + "\n"
+
+    def uri(self, term):
+        """term (an n-quads uri) as prefix:name if it has a namespace."""
+        name = self.names.get(term)
+        if name is None:
+            name = term
+            uri = term[1:-1]
+            split = max(uri.rfind("/"), uri.rfind("#")) + 1
+            prefix = self.prefixes.get(uri[:split])
+            if prefix is not None and r_local_name.match(uri[split:]):
+                name = f"{prefix}:{uri[split:]}"
+            # bounded, with -stream the uris of every entity would pile up
+            if len(self.names) < 100000:
+                self.names[term] = name
+        return name
+
+    def term(self, term):
+        if term.startswith("<"):
+            return self.uri(term)
+        if term.startswith('"') and term.endswith(">"):
+            # typed literal
+            lexical, datatype = term.rsplit("^^", 1)
+            return f"{lexical}^^{self.uri(datatype)}"
+        return term
+
+    def write(self, f, lines, indent=""):
+        """
+        Write the triples of lines (n-quads without graph), a statement per
+        subject with its objects grouped by predicate.
+        """
+        subjects = {}
+        for line in lines:
+            s, p, o = line.split(" ", 2)
+            objects = subjects.setdefault(s, {}).setdefault(p, {})
+            objects[o] = None
+        for s, predicates in subjects.items():
+            statements = [
+                ("a" if p == self.rdf_type else self.uri(p))
+                + " "
+                + ", ".join(self.term(o) for o in objects)
+                for p, objects in predicates.items()
+            ]
+            separator = f" ;\n{indent}    "
+            f.write(f"{indent}{self.term(s)} {separator.join(statements)} .\n")
+
+
+def nquads_to_trig(path, destination, namespaces=None):
+    """
+    Write the n-quads file path as trig, a block per run of quads of the same
+    graph: a graph may have several blocks, trig merges them.
+    """
+    compactor = Compactor(namespaces or {})
+    with open(destination, "w", encoding="utf-8") as f:
+        f.write(compactor.header())
+        for graph, lines in graph_blocks(path):
+            f.write(f"{compactor.uri(graph)} {{\n")
+            compactor.write(f, lines, "    ")
+            f.write("}\n\n")
+
+
+def nquads_to_turtle(path, destination, namespaces=None):
+    """
+    Write the triples of the n-quads file path as turtle, without their
+    graphs. The triples are written once per graph block, so that the memory
+    does not grow with the file: a triple of several graphs is written again,
+    turtle merges it.
+    """
+    compactor = Compactor(namespaces or {})
+    with open(destination, "w", encoding="utf-8") as f:
+        f.write(compactor.header())
+        for _, lines in graph_blocks(path):
+            compactor.write(f, lines)
@@ -0,0 +1,40 @@
+import threading
+
+
+class QuadBuffer:
+    """
+    Stands in for the Dataset the entities are built into: their (s, p, o,
+    graph) quads are added to the dataset with addN in batches, instead of
+    going through the context and index bookkeeping of rdflib once per
+    triple. Any object with get_context() and addN() can be the dataset.
+    Stages running in threads can share it.
+    """
+
+    BATCH_SIZE = 10000
+
+    def __init__(self, dataset, batch_size=BATCH_SIZE):
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.quads = []
+        self.lock = threading.Lock()
+
+    def get_context(self, identifier):
+        return self.dataset.get_context(identifier)
+
+    def add(self, quad):
+        self.addN([quad])
+
+    def addN(self, quads):
+        with self.lock:
+            self.quads.extend(quads)
+            if len(self.quads) >= self.batch_size:
+                self.write()
+
+    def flush(self):
+        with self.lock:
+            self.write()
+
+    def write(self):
+        if self.quads:
+            self.dataset.addN(self.quads)
+            self.quads = []
@@ -0,0 +1,230 @@
+import json
+import os
+import sqlite3
+import threading
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.store import NO_STORE, VALID_STORE, Store
+
+# rows of a query read at a time, the lock is released in between
+BATCH_SIZE = 10000
+
+
+def encode(term):
+    """Term as the text stored in the quads table."""
+    if isinstance(term, Literal):
+        datatype = str(term.datatype) if term.datatype is not None else None
+        return "L" + json.dumps([str(term), datatype, term.language])
+    if isinstance(term, BNode):
+        return "B" + term
+    return "U" + term
+
+
+def decode(text):
+    kind, value = text[0], text[1:]
+    if kind == "L":
+        lexical, datatype, language = json.loads(value)
+        return Literal(lexical, lang=language, datatype=datatype)
+    if kind == "B":
+        return BNode(value)
+    return URIRef(value)
+
+
+class SQLiteStore(Store):
+    """
+    Graph aware rdflib store kept in a sqlite file, so that the dataset of
+    a run does not have to fit in memory and stays on disk after it:
+    Dataset(store=SQLiteStore("output/store.sqlite")). Terms are stored as
+    text, relative uris included. Changes are committed by commit() and
+    close().
+    """
+
+    context_aware = True
+    graph_aware = True
+    formula_aware = False
+    transaction_aware = False
+
+    def __init__(self, configuration=None, identifier=None):
+        super().__init__(configuration, identifier)
+        self.db = None
+        # the stages run in threads sharing the connection
+        self.lock = threading.RLock()
+        if configuration is not None:
+            self.open(configuration, create=True)
+
+    def open(self, configuration, create=False):
+        if not create and not os.path.exists(configuration):
+            return NO_STORE
+        self.db = sqlite3.connect(configuration, check_same_thread=False)
+        self.db.executescript(
+            """
+            PRAGMA journal_mode = WAL;
+            PRAGMA synchronous = NORMAL;
+            CREATE TABLE IF NOT EXISTS quads (
+                s TEXT NOT NULL, p TEXT NOT NULL, o TEXT NOT NULL, c TEXT NOT NULL,
+                UNIQUE (c, s, p, o)
+            );
+            CREATE INDEX IF NOT EXISTS quads_spo ON quads (s, p, o);
+            CREATE INDEX IF NOT EXISTS quads_po ON quads (p, o);
+            CREATE INDEX IF NOT EXISTS quads_o ON quads (o);
+            CREATE TABLE IF NOT EXISTS graphs (c TEXT PRIMARY KEY);
+            CREATE TABLE IF NOT EXISTS namespaces (
+                prefix TEXT PRIMARY KEY, namespace TEXT UNIQUE NOT NULL
+            );
+            """
+        )
+        return VALID_STORE
+
+    def close(self, commit_pending_transaction=False):
+        with self.lock:
+            if self.db is not None:
+                self.db.commit()
+                self.db.close()
+                self.db = None
+
+    def destroy(self, configuration):
+        self.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(configuration + suffix):
+                os.remove(configuration + suffix)
+
+    def commit(self):
+        with self.lock:
+            self.db.commit()
+
+    def execute(self, query, values=()):
+        with self.lock:
+            return self.db.execute(query, values)
+
+    def fetchall(self, query, values=()):
+        with self.lock:
+            return self.db.execute(query, values).fetchall()
+
+    def rows(self, query, values=()):
+        """Rows of query, read in batches so that the other threads are not held up."""
+        with self.lock:
+            cursor = self.db.execute(query, values)
+        while True:
+            with self.lock:
+                batch = cursor.fetchmany(BATCH_SIZE)
+            if not batch:
+                return
+            yield from batch
+
+    def clear(self):
+        """Remove every graph, the namespaces are kept."""
+        with self.lock:
+            self.db.execute("DELETE FROM quads")
+            self.db.execute("DELETE FROM graphs")
+            self.db.commit()
+
+    def add(self, triple, context, quoted=False):
+        self.addN([(*triple, context)])
+
+    def addN(self, quads):
+        rows = []
+        graphs = set()
+        for s, p, o, c in quads:
+            c = encode(c.identifier)
+            graphs.add(c)
+            rows.append((encode(s), encode(p), encode(o), c))
+        with self.lock:
+            self.db.executemany("INSERT OR IGNORE INTO quads VALUES (?, ?, ?, ?)", rows)
+            self.db.executemany(
+                "INSERT OR IGNORE INTO graphs VALUES (?)", [(c,) for c in graphs]
+            )
+
+    def where(self, triple_pattern, context):
+        conditions, values = [], []
+        for column, term in zip("spo", triple_pattern):
+            if term is not None:
+                conditions.append(f"{column} = ?")
+                values.append(encode(term))
+        if context is not None:
+            conditions.append("c = ?")
+            values.append(encode(context.identifier))
+        if not conditions:
+            return "", values
+        return " WHERE " + " AND ".join(conditions), values
+
+    def remove(self, triple_pattern, context=None):
+        where, values = self.where(triple_pattern, context)
+        self.execute("DELETE FROM quads" + where, values)
+
+    def triples(self, triple_pattern, context=None):
+        where, values = self.where(triple_pattern, context)
+        if context is not None:
+            for s, p, o in self.rows("SELECT s, p, o FROM quads" + where, values):
+                yield (decode(s), decode(p), decode(o)), iter([context])
+            return
+        for s, p, o, contexts in self.rows(
+            "SELECT s, p, o, json_group_array(c) FROM quads"
+            + where
+            + " GROUP BY s, p, o",
+            values,
+        ):
+            yield (decode(s), decode(p), decode(o)), self.graphs_of(contexts)
+
+    def graphs_of(self, contexts):
+        for c in json.loads(contexts):
+            yield Graph(store=self, identifier=decode(c))
+
+    def __len__(self, context=None):
+        if context is None:
+            query = "SELECT COUNT(*) FROM (SELECT DISTINCT s, p, o FROM quads)"
+            return self.fetchall(query)[0][0]
+        where, values = self.where((None, None, None), context)
+        return self.fetchall("SELECT COUNT(*) FROM quads" + where, values)[0][0]
+
+    def contexts(self, triple=None):
+        if triple is None:
+            rows = self.fetchall("SELECT c FROM graphs")
+        else:
+            where, values = self.where(triple, None)
+            rows = self.fetchall("SELECT DISTINCT c FROM quads" + where, values)
+        for (c,) in rows:
+            yield Graph(store=self, identifier=decode(c))
+
+    def add_graph(self, graph):
+        self.execute(
+            "INSERT OR IGNORE INTO graphs VALUES (?)", (encode(graph.identifier),)
+        )
+
+    def remove_graph(self, graph):
+        c = encode(graph.identifier)
+        with self.lock:
+            self.db.execute("DELETE FROM quads WHERE c = ?", (c,))
+            self.db.execute("DELETE FROM graphs WHERE c = ?", (c,))
+
+    def bind(self, prefix, namespace, override=True):
+        with self.lock:
+            bound = self.db.execute(
+                "SELECT 1 FROM namespaces WHERE prefix = ? OR namespace = ?",
+                (prefix, str(namespace)),
+            ).fetchone()
+            if bound and not override:
+                return
+            self.db.execute(
+                "DELETE FROM namespaces WHERE prefix = ? OR namespace = ?",
+                (prefix, str(namespace)),
+            )
+            self.db.execute(
+                "INSERT INTO namespaces VALUES (?, ?)", (prefix, str(namespace))
+            )
+
+    def namespace(self, prefix):
+        rows = self.fetchall(
+            "SELECT namespace FROM namespaces WHERE prefix = ?", (prefix,)
+        )
+        return URIRef(rows[0][0]) if rows else None
+
+    def prefix(self, namespace):
+        rows = self.fetchall(
+            "SELECT prefix FROM namespaces WHERE namespace = ?", (str(namespace),)
+        )
+        return rows[0][0] if rows else None
+
+    def namespaces(self):
+        for prefix, namespace in self.fetchall(
+            "SELECT prefix, namespace FROM namespaces"
+        ):
+            yield prefix, URIRef(namespace)
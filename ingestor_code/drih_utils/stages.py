@@ -0,0 +1,217 @@
+import cProfile
+import os
+import resource
+import threading
+import time
+import tracemalloc
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+
+# a step of the run: run() is called once the stages named in inputs are done
+Stage = namedtuple("Stage", ["name", "run", "inputs"])
+
+# metrics of the stage running in the thread
+current = threading.local()
+
+
+def measure(**counts):
+    """Add counts (rows, quads ...) to the metrics of the running stage."""
+    metrics = getattr(current, "metrics", None)
+    if metrics is not None:
+        for name, count in counts.items():
+            metrics[name] = metrics.get(name, 0) + count
+
+
+def add_part(part, wall_s, cpu_s):
+    """Add the time of a part of the running stage done elsewhere, e.g. in a process."""
+    metrics = getattr(current, "metrics", None)
+    if metrics is not None:
+        metrics.setdefault("parts", {})[part] = {"wall_s": wall_s, "cpu_s": cpu_s}
+
+
+@contextmanager
+def timed(part):
+    """Time a part of the running stage, e.g. one output format."""
+    start, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        add_part(part, time.perf_counter() - start, time.thread_time() - cpu)
+
+
+def memory_usage():
+    """
+    Memory of the process in bytes: allocated by python now and at its peak
+    (if tracemalloc is tracing), resident now (linux) and at its peak.
+    """
+    usage = {}
+    if tracemalloc.is_tracing():
+        usage["traced"], usage["traced_peak"] = tracemalloc.get_traced_memory()
+    try:
+        with open("/proc/self/statm") as f:
+            usage["rss"] = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        pass
+    # kilobytes on linux
+    usage["max_rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    return usage
+
+
+def children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class Stages:
+    """
+    The steps of a run as a graph of stages with declared inputs. run() runs
+    them in the order they were added, or with workers > 1 each as soon as
+    its inputs are done, in a pool of threads. The wall and cpu time of every
+    stage and the counts it measure()s are kept in metrics, with a cProfile
+    dump per stage in profile_dir if given. With memory, the memory retained
+    and the peak of every stage are measured with tracemalloc (which has to
+    be tracing), stages running at the same time share their peaks. run()
+    returns what the stages returned.
+    """
+
+    def __init__(self, profile_dir=None, memory=False):
+        self.stages = {}
+        # name -> start_s (since run() started), wall_s, cpu_s, counts, parts,
+        # memory
+        self.metrics = {}
+        self.results = {}
+        self.profile_dir = profile_dir
+        self.memory = memory
+
+    def add(self, name, run, inputs=()):
+        """Add a stage, its inputs have to be added before it."""
+        for input_name in inputs:
+            if input_name not in self.stages:
+                raise ValueError(f"stage {name} needs unknown stage {input_name}")
+        self.stages[name] = Stage(name, run, tuple(inputs))
+
+    def names(self):
+        return list(self.stages)
+
+    def run_stage(self, stage):
+        metrics = current.metrics = {}
+        profiler = None
+        if self.profile_dir is not None:
+            profiler = cProfile.Profile()
+        if self.memory:
+            before = memory_usage()
+            tracemalloc.reset_peak()
+        start, cpu, forked_cpu = time.perf_counter(), time.thread_time(), children_cpu()
+        try:
+            if profiler is not None:
+                profiler.enable()
+            self.results[stage.name] = stage.run()
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            current.metrics = None
+        metrics["start_s"] = start - self.start
+        metrics["wall_s"] = time.perf_counter() - start
+        # the processes of -workers are counted once they have exited
+        metrics["cpu_s"] = time.thread_time() - cpu + children_cpu() - forked_cpu
+        if self.memory:
+            after = memory_usage()
+            metrics["memory"] = {
+                "traced_before": before["traced"],
+                "traced_after": after["traced"],
+                "retained": after["traced"] - before["traced"],
+                "peak": after["traced_peak"] - before["traced"],
+                "rss": after.get("rss"),
+                "max_rss": after["max_rss"],
+            }
+        self.metrics[stage.name] = metrics
+        if profiler is not None:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler.dump_stats(
+                os.path.join(self.profile_dir, stage.name.replace(" ", "_") + ".pstats")
+            )
+
+    def run(self, workers=1):
+        self.start = time.perf_counter()
+        if workers <= 1:
+            for stage in self.stages.values():
+                self.run_stage(stage)
+            return self.results
+
+        waiting = dict(self.stages)
+        done = set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while waiting or running:
+                for name, stage in list(waiting.items()):
+                    if done.issuperset(stage.inputs):
+                        del waiting[name]
+                        running[executor.submit(self.run_stage, stage)] = name
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        future.result()
+                    except BaseException:
+                        # let the running stages finish, start no other
+                        waiting.clear()
+                        wait(running)
+                        raise
+                    done.add(name)
+        return self.results
+
+    def critical_path(self):
+        """
+        (seconds, names) of the chain of stages, each an input of the next,
+        taking the longest: the run cannot be faster than it.
+        """
+        longest = {}
+        for name, stage in self.stages.items():
+            before = max(
+                (longest[input_name] for input_name in stage.inputs),
+                default=(0, []),
+            )
+            longest[name] = (before[0] + self.metrics[name]["wall_s"], before[1] + [name])
+        return max(longest.values(), default=(0, []))
+
+    def total(self):
+        return max(
+            (m["start_s"] + m["wall_s"] for m in self.metrics.values()), default=0
+        )
+
+    def summary(self):
+        """The metrics of the stages, with rows and quads per second."""
+        stages = {}
+        for name in self.stages:
+            metrics = dict(self.metrics[name])
+            for count in ("rows", "quads"):
+                if count in metrics and metrics["wall_s"] > 0:
+                    metrics[count + "_per_s"] = metrics[count] / metrics["wall_s"]
+            stages[name] = metrics
+        seconds, path = self.critical_path()
+        return {
+            "stages": stages,
+            "critical_path": {"seconds": seconds, "stages": path},
+            "total_s": self.total(),
+        }
+
+    def report(self):
+        header = "stages (wall time, cpu time in seconds, started after"
+        if self.memory:
+            header += "; retained, peak memory, rss in MB"
+        print(header + "):")
+        for name in self.stages:
+            metrics = self.metrics[name]
+            line = (
+                f"  {name:<28} {metrics['wall_s']:8.2f} {metrics['cpu_s']:8.2f}"
+                f" {metrics['start_s']:8.2f}"
+            )
+            if self.memory:
+                memory = metrics["memory"]
+                line += f" {memory['retained'] / 2**20:9.1f} {memory['peak'] / 2**20:9.1f}"
+                line += f" {(memory['rss'] or 0) / 2**20:9.1f}"
+            print(line)
+        seconds, path = self.critical_path()
+        print(f"critical path ({seconds:.2f}s): " + " > ".join(path))
+        print(f"total {self.total():.2f}s")
@@ -0,0 +1,207 @@
+"""
+Compares the -store backends on a graph of an earlier run:
+
+    python -m ingestor_code.drih_utils.store_benchmark [-nquads FILE] [-stores memory sqlite]
+
+For each store, in a process of its own, the quads are loaded into a fresh
+dataset through a QuadBuffer like the build does, written back as n-quads and
+trig (data_test parses the trig of the store) and the data_test queries are
+run on the union graph. The queries are those of the test_dev_v3 snapshots in
+-cache_dir if a run cached them (-cache or -offline), a few of the same shape
+otherwise.
+"""
+import argparse
+import io
+import itertools
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from rdflib import ConjunctiveGraph
+from .cache import SnapshotCache
+from .nquads import parse_nquads
+from .quad_buffer import QuadBuffer
+from .stores import STORES, open_dataset
+
+TEST_CLASSES = [
+    "team",
+    "person",
+    "group",
+    "dataset_persistent",
+    "software_persistent",
+    "dataset_volatile",
+    "software_volatile",
+    "service",
+    "digital_machine_event",
+    "project_research",
+    "project_service",
+    "join_leave",
+]
+
+PREFIXES = """
+PREFIX crm: <http://www.cidoc-crm.org/cidoc-crm/>
+PREFIX crm_pem: <http://parthenos.d4science.org/CRMext/CRMpe.rdfs/>
+PREFIX rdfs: <http://www.w3.org/2000/01/rdf-schema#>
+"""
+
+# used when no test_dev_v3 snapshot is cached
+QUERIES = [
+    PREFIXES
+    + """
+    SELECT ?person ?name WHERE {
+        ?person a crm:E21_Person .
+        OPTIONAL { ?person crm:P1_is_identified_by/crm:P190_has_symbolic_content ?name }
+    }""",
+    PREFIXES
+    + """
+    SELECT ?team ?member WHERE {
+        ?team a crm_pem:PE34_Team .
+        OPTIONAL { ?member crm:P107i_is_current_or_former_member_of ?team }
+    }""",
+    PREFIXES
+    + """
+    SELECT ?service ?provider WHERE {
+        ?service a crm_pem:PE1_Service .
+        OPTIONAL { ?service crm_pem:PP2_provided_by ?provider }
+    }""",
+    PREFIXES
+    + """
+    SELECT ?project ?label ?topic WHERE {
+        ?project a crm_pem:PE45_Research_Project ; rdfs:label ?label .
+        OPTIONAL { ?project crm:P21_had_general_purpose ?topic }
+    }""",
+]
+
+
+def data_test_queries(cache_dir):
+    cache = SnapshotCache(cache_dir)
+    queries = []
+    for test_class in TEST_CLASSES:
+        key = f"test_dev_v3.{test_class}"
+        if cache.has(key):
+            queries += [
+                row["query"]
+                for row in cache.load(key)
+                if row.get("test_bool") and row.get("query")
+            ]
+    return queries or QUERIES
+
+
+def read_quads(path, chunk_size=QuadBuffer.BATCH_SIZE):
+    """Quads of the n-quads file, parsed chunk_size lines at a time."""
+    with open(path, "rb") as f:
+        while True:
+            lines = list(itertools.islice(f, chunk_size))
+            if not lines:
+                return
+            graph = parse_nquads(ConjunctiveGraph(), io.BytesIO(b"".join(lines)))
+            yield from graph.quads()
+
+
+def run(store, nquads, cache_dir):
+    """Measurements of store, run in the process of its own."""
+    path = None
+    if STORES[store] is not None:
+        path = os.path.join(tempfile.mkdtemp(), os.path.basename(STORES[store]))
+    timings = {"store": store}
+
+    start = time.perf_counter()
+    dataset = open_dataset(store, path)
+    quads = QuadBuffer(dataset)
+    for s, p, o, c in read_quads(nquads):
+        quads.add((s, p, o, quads.get_context(c.identifier)))
+    quads.flush()
+    dataset.commit()
+    timings["load_s"] = time.perf_counter() - start
+    timings["quads"] = sum(1 for _ in dataset.quads())
+
+    start = time.perf_counter()
+    dataset.serialize(format="nquads", destination=io.BytesIO())
+    timings["nquads_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    dataset.serialize(format="trig", destination=io.BytesIO())
+    timings["trig_s"] = time.perf_counter() - start
+
+    queries = data_test_queries(cache_dir)
+    dataset.default_union = True
+    start = time.perf_counter()
+    for query in queries:
+        list(dataset.query(query))
+    timings["queries"] = len(queries)
+    timings["queries_s"] = time.perf_counter() - start
+
+    dataset.close()
+    # kilobytes on linux
+    timings["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return timings
+
+
+def available(store):
+    if store != "berkeleydb":
+        return True
+    try:
+        import berkeleydb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "-nquads",
+        help="n-quads file of a run (default: output/rdf/overall_nquads.txt)",
+        default="output/rdf/overall_nquads.txt",
+    )
+    parser.add_argument(
+        "-stores", help="stores to compare", nargs="+", choices=list(STORES), default=list(STORES)
+    )
+    parser.add_argument(
+        "-cache_dir", help="snapshot cache of the queries", default=SnapshotCache.CACHE_DIR
+    )
+    parser.add_argument(
+        "-json", help="also write the results to this file", default=None
+    )
+    parser.add_argument("-run", help=argparse.SUPPRESS, default=None)
+    args = parser.parse_args()
+
+    if args.run is not None:
+        print(json.dumps(run(args.run, args.nquads, args.cache_dir)))
+        return
+
+    results = []
+    for store in args.stores:
+        if not available(store):
+            print(f"skipping {store}, the berkeleydb package is not installed")
+            continue
+        print(f"benchmarking {store}")
+        out = subprocess.run(
+            [sys.executable, "-m", __spec__.name, "-run", store]
+            + ["-nquads", args.nquads, "-cache_dir", args.cache_dir],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(out.splitlines()[-1]))
+
+    columns = ["store", "quads", "load_s", "nquads_s", "trig_s", "queries", "queries_s", "peak_rss_mb"]
+    print("".join(f"{column:>12}" for column in columns))
+    for result in results:
+        print(
+            "".join(
+                f"{result[column]:>12.2f}" if isinstance(result[column], float)
+                else f"{result[column]:>12}"
+                for column in columns
+            )
+        )
+    if args.json is not None:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import os
+from rdflib import Dataset
+from .sqlite_store import SQLiteStore
+
+# -store choice -> default location of the store
+STORES = {
+    "memory": None,
+    "sqlite": "output/store.sqlite",
+    "berkeleydb": "output/store.bdb/",
+}
+
+
+def open_dataset(store="memory", path=None, clear=True):
+    """
+    Dataset on one of STORES: memory (rdflib's default), sqlite (a
+    SQLiteStore file) or berkeleydb (rdflib's BerkeleyDB store, needs the
+    berkeleydb package). The persistent stores are reopened at path, with
+    the graph of the last run unless cleared.
+    """
+    path = path or STORES[store]
+    if store == "memory":
+        return Dataset()
+    os.makedirs(os.path.dirname(path.rstrip("/")) or ".", exist_ok=True)
+    if store == "sqlite":
+        dataset = Dataset(store=SQLiteStore(path))
+    elif store == "berkeleydb":
+        try:
+            import berkeleydb  # noqa: F401
+        except ImportError:
+            raise SystemExit("-store berkeleydb needs the berkeleydb package") from None
+        dataset = Dataset(store="BerkeleyDB")
+        dataset.open(path, create=True)
+    else:
+        raise ValueError(f"unknown store {store}")
+    if clear:
+        clear_dataset(dataset)
+    return dataset
+
+
+def clear_dataset(dataset):
+    """Remove every graph of dataset, its namespaces are kept."""
+    if isinstance(dataset.store, SQLiteStore):
+        dataset.store.clear()
+        return
+    for context in list(dataset.contexts()):
+        dataset.remove_graph(context)
@@ -0,0 +1,117 @@
+import gzip
+import time
+import zlib
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class Transport:
+    """
+    HTTP transport shared by the nocodb client and the pushes to the remote:
+    one requests session (connection pool, keep-alive, gzip responses) with
+    timeouts and exponential backoff retries on 429 and 5xx responses.
+    """
+
+    # (connect, read) timeouts in seconds
+    TIMEOUT = (10, 300)
+    RETRIES = 5
+    # waits 0.5s, 1s, 2s, 4s ... between the retries
+    BACKOFF_FACTOR = 0.5
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    # bytes of a file read and compressed at a time by post_file
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(
+        self,
+        pool_size=10,
+        timeout=TIMEOUT,
+        retries=RETRIES,
+        backoff_factor=BACKOFF_FACTOR,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=self.RETRY_STATUSES,
+            # the sparql updates and uploads are idempotent, retry them too
+            allowed_methods=None,
+            # hand the last response back instead of raising MaxRetryError
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=max(pool_size, 1), max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({"Accept-Encoding": "gzip, deflate"})
+        # uploads of files are retried by post_file, which opens them again
+        self.upload_session = requests.Session()
+        self.upload_session.mount("http://", HTTPAdapter(pool_connections=1))
+        self.upload_session.mount("https://", HTTPAdapter(pool_connections=1))
+
+    def request(self, method, url, gzip_body=False, **kwargs):
+        """
+        Send a request on the shared session. gzip_body compresses data and
+        sets the Content-Encoding header accordingly.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if gzip_body and kwargs.get("data") is not None:
+            data = kwargs["data"]
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            kwargs["data"] = gzip.compress(data)
+            kwargs["headers"] = {
+                **(kwargs.get("headers") or {}),
+                "Content-Encoding": "gzip",
+            }
+        return self.session.request(method, url, **kwargs)
+
+    def post_file(self, url, path, gzip_body=False, **kwargs):
+        """
+        POST the file at path, streamed from disk (and gzipped chunk by chunk
+        with gzip_body) instead of read into memory. Retried with backoff on
+        connection errors and the RETRY_STATUSES, the file is opened again for
+        every attempt.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        if gzip_body:
+            kwargs["headers"] = {
+                **(kwargs.get("headers") or {}),
+                "Content-Encoding": "gzip",
+            }
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                with open(path, "rb") as f:
+                    data = gzip_chunks(f, self.CHUNK_SIZE) if gzip_body else f
+                    response = self.upload_session.post(url, data=data, **kwargs)
+            except requests.exceptions.ConnectionError:
+                if last_attempt:
+                    raise
+            else:
+                if last_attempt or response.status_code not in self.RETRY_STATUSES:
+                    return response
+            time.sleep(self.backoff_factor * 2**attempt)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+
+def gzip_chunks(f, chunk_size=Transport.CHUNK_SIZE):
+    """The content of the binary file f gzipped, chunk_size bytes at a time."""
+    compressor = zlib.compressobj(wbits=31)
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
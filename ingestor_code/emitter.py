@@ -0,0 +1,181 @@
+import hashlib
+import io
+import os
+from contextlib import contextmanager
+import pydotplus
+from rdflib import Literal, URIRef
+from rdflib.term import Node
+from rdflib.tools.rdf2dot import rdf2dot
+from .mapping import (
+    Attribute,
+    ContactPoint,
+    Description,
+    Identifier,
+    Link,
+    Name,
+    TimeSpan,
+    Type,
+    mapping_fields,
+    template_column,
+)
+
+# pattern -> PatternBuilder method writing its code
+PATTERN_WRITERS = {
+    Name: "add_name",
+    Description: "add_description",
+    Type: "add_type",
+    Identifier: "add_identifier",
+    ContactPoint: "add_contact_point",
+    Attribute: "add_attribute",
+    TimeSpan: "add_time_span",
+    Link: "add_link",
+}
+
+
+class Code:
+    """Source of an emit function being written, with its constants."""
+
+    def __init__(self, **names):
+        self.lines = []
+        self.depth = 1
+        self.names = {"URIRef": URIRef, "Literal": Literal, **names}
+        # constant (or its id) -> its name in the function
+        self.constants = {}
+        # triples of the shared types the function declares
+        self.declarations = []
+
+    def const(self, value):
+        key = (type(value), value) if isinstance(value, str) else id(value)
+        if key not in self.constants:
+            name = f"c{len(self.constants)}"
+            self.constants[key] = name
+            self.names[name] = value
+        return self.constants[key]
+
+    def line(self, text):
+        self.lines.append("    " * self.depth + text)
+
+    @contextmanager
+    def block(self, text):
+        self.line(text)
+        self.depth += 1
+        yield
+        self.depth -= 1
+
+    def add(self, s, p, o):
+        """Append the quad, terms are constants and str are expressions."""
+        s, p, o = [self.const(t) if isinstance(t, Node) else t for t in (s, p, o)]
+        self.line(f"add(({s}, {p}, {o}, graph))")
+
+    def function(self, name, filename):
+        header = [f"def {name}(row, graph, quads):", "    add = quads.append"]
+        source = "\n".join(header + self.lines)
+        exec(compile(source, filename, "exec"), self.names)
+        return self.names[name], source
+
+
+class Emitter:
+    """
+    A mapping compiled for the namespaces of the run: subject() and graph()
+    mint the uris of the entity of a row, emit(row, graph, quads) appends
+    the quads of its named graph.
+    """
+
+    def __init__(self, attribute, mapping, pattern_builder):
+        self.attribute = attribute
+        self.mapping = mapping
+        self.subject_key, self.subject_template = template_column(mapping.subject)
+        self.graph_key, self.graph_template = template_column(mapping.graph)
+        self.pdlm = str(pattern_builder.namespaces["pdlm"])
+        self.ckg = str(pattern_builder.namespaces["ckg"])
+        self.columns = mapping_fields(mapping)
+        # subject key -> subject
+        self.subjects = {}
+        self.emit = None
+        self.source = None
+        # hash of the compiled mapping, part of every digest
+        self.version = None
+        # (relation output, target attribute, subject of the target rows)
+        self.links = []
+        # triples of the shared types emit() declares, for every row
+        self.declarations = []
+
+    def subject_string(self, row):
+        return self.subject_template.format(row[self.subject_key])
+
+    def subject(self, row):
+        key = row[self.subject_key]
+        subject = self.subjects.get(key)
+        if subject is None:
+            subject = URIRef(self.pdlm + self.subject_template.format(key))
+            self.subjects[key] = subject
+        return subject
+
+    def graph(self, row):
+        return URIRef(self.ckg + self.graph_template.format(row[self.graph_key]))
+
+    def digest(self, row, index):
+        """
+        Hash of what the named graph of row is built from: the compiled
+        mapping, the columns it reads and the subjects of the linked rows.
+        """
+        values = [row[column] for column in self.columns]
+        for output, target, subject_of in self.links:
+            rows = index[target]
+            values.append([str(subject_of(rows[i])) for i in row.get(output) or ()])
+        return hashlib.sha1((self.version + repr(values)).encode()).hexdigest()
+
+    def compile(self, pattern_builder, emitters, index):
+        code = Code(index=index, declare=pattern_builder.declare)
+        code.line(
+            f"subject_string = {self.subject_template!r}"
+            f".format(row[{self.subject_key!r}])"
+        )
+        code.line(f"subject = URIRef({code.const(self.pdlm)} + subject_string)")
+        for rdf_class in self.mapping.classes:
+            code.add("subject", pattern_builder.a, pattern_builder.term(rdf_class))
+        for pattern in self.mapping.patterns:
+            write = getattr(pattern_builder, PATTERN_WRITERS[type(pattern)])
+            if isinstance(pattern, Link):
+                subject_of = emitters[pattern.target].subject
+                self.links.append((pattern.output, pattern.target, subject_of))
+                write(code, pattern, subject_of)
+            else:
+                write(code, pattern)
+        self.emit, self.source = code.function(
+            f"emit_{self.attribute}", f"<mapping of {self.attribute}>"
+        )
+        self.declarations = code.declarations
+        terms = sorted(
+            (name, str(value))
+            for name, value in code.names.items()
+            if isinstance(value, str)
+        )
+        self.version = hashlib.sha1(repr((self.source, terms)).encode()).hexdigest()
+
+
+def compile_mappings(mappings, pattern_builder, index):
+    """
+    Compile mappings into Emitters, once per run. index (attribute -> Id ->
+    row) is read when emitting, to mint the subjects of linked rows.
+    """
+    emitters = {
+        attribute: Emitter(attribute, mapping, pattern_builder)
+        for attribute, mapping in mappings.items()
+    }
+    for emitter in emitters.values():
+        emitter.compile(pattern_builder, emitters, index)
+    return emitters
+
+
+def visualise(graph, subject_string):
+    """Draw the named graph of the entity subject_string into output/pictures/."""
+    stream = io.StringIO()
+    rdf2dot(graph, stream)
+    dg = pydotplus.graph_from_dot_data(stream.getvalue())
+    print("creating diagram of named graph for entity " + subject_string)
+    os.makedirs("output/pictures/" + os.path.dirname(subject_string), exist_ok=True)
+    dg.write_png(
+        "output/pictures/" + subject_string + ".png",
+        prog=["dot", "-Goverlap=false"],
+    )
@@ -0,0 +1,298 @@
+from collections import namedtuple
+from string import Formatter
+
+# how the rows of a nocodb table are mapped to the PDLM: the uri of the entity
+# is pdlm:<subject> and its named graph ckg:<graph>, both formatted with
+# columns of the row ("actor/person/{identifier}"); the entity is an instance
+# of each of classes and patterns add its attributes and links. Terms are
+# written <short_form>:<name> with the namespaces of Meta_Namespaces.
+Mapping = namedtuple("Mapping", ["subject", "graph", "classes", "patterns"])
+
+# laf.6: name in column, at <subject><path>
+Name = namedtuple("Name", ["column", "path"], defaults=["/name/"])
+# pdlf.1 and pdlf.2: description in column, at <subject><path>, of type
+Description = namedtuple(
+    "Description", ["column", "type", "path"], defaults=[None, "/description/"]
+)
+# laf.11 and laf.12: the entity has type, type has metatype
+Type = namedtuple("Type", ["type", "metatype"], defaults=[None])
+# laf.10 and laf.9: identifier in column, at <subject><path>, of type
+Identifier = namedtuple("Identifier", ["column", "path", "type"], defaults=[None])
+# contact point in column, at <subject><path>
+ContactPoint = namedtuple("ContactPoint", ["column", "path"])
+# literal of column as the object of predicate
+Attribute = namedtuple("Attribute", ["predicate", "column"])
+# time-span at <subject><path> from column start to column end, if both are set
+TimeSpan = namedtuple("TimeSpan", ["start", "end", "path"], defaults=["/time_span/"])
+# the entity is linked by predicate to the target rows of the relation output
+# (see relations.py), or the target rows to the entity if inverse
+Link = namedtuple(
+    "Link", ["output", "predicate", "target", "inverse"], defaults=[False]
+)
+
+DESCRIPTION_TYPE = "pdlm:type/descriptions/desc_type_placeholder"
+
+# DataService attribute -> nocodb table
+TABLES = {
+    "types": "E55_Types",
+    "projects": "PE45_Research_Projects",
+    "persons": "E21_Persons",
+    "teams": "PE34_Teams",
+    "groups": "E74_Groups",
+    "services": "PE1_Services",
+    "digital_objects": "D1_Digital_Objects",
+    "digital_curating_services": "PE10_Digital_Curating_Services",
+    "digital_hosting_services": "PE5_Digital_Hosting_Services",
+    "volatile_datasets": "PE24_Volatile_Datasets",
+    "persistent_datasets": "PE22_Persistent_Datasets",
+    "access_points": "PE26_Access_Points",
+    "digital_machine_events": "D7_Digital_Machine_Events",
+    "namespaces": "Meta_Namespaces",
+    "topics": "Topics",
+}
+
+# columns read from the tables that have no mapping
+FIELDS = {
+    "namespaces": ["short_form", "long_form"],
+    "types": ["identifier", "name"],
+}
+
+# DataService attribute -> mapping, in build order
+MAPPINGS = {
+    "persons": Mapping(
+        subject="actor/person/{identifier}",
+        graph="persons/{identifier}",
+        classes=["crm:E21_Person"],
+        patterns=[
+            Name("name"),
+            ContactPoint("contact", "/email/"),
+            # noco_identifier is a temporary placeholder
+            Identifier("identifier", "/pid/", "ckg:noco_identifier"),
+        ],
+    ),
+    "teams": Mapping(
+        subject="actor/project-team/{identifier}",
+        graph="actor/project-teams/{identifier}",
+        classes=["crm_pem:PE34_Team"],
+        patterns=[
+            Name("name"),
+            Description("description", DESCRIPTION_TYPE),
+            Link(
+                "persons",
+                "crm:P107i_is_current_or_former_member_of",
+                "persons",
+                inverse=True,
+            ),
+        ],
+    ),
+    "groups": Mapping(
+        subject="actor/group/{identifier}",
+        graph="actor/groups/{identifier}",
+        classes=["crm:E74_Group"],
+        patterns=[
+            Name("name"),
+            Type("pdlm:type/", "pdlm:type/metatype_placeholder/"),
+            Link(
+                "persons",
+                "crm:P107i_is_current_or_former_member_of",
+                "persons",
+                inverse=True,
+            ),
+            Link(
+                "groups",
+                "crm:P107i_is_current_or_former_member_of",
+                "groups",
+                inverse=True,
+            ),
+        ],
+    ),
+    "access_points": Mapping(
+        subject="access_point/{identifier}",
+        graph="access_point/{identifier}",
+        classes=["crm_pem:PE29_Access_Point"],
+        patterns=[
+            Attribute("rdfs:label", "url"),
+            Attribute("crm:P190_has_symbolic_content", "url"),
+        ],
+    ),
+    "services": Mapping(
+        subject="activity/service/{identifier}",
+        graph="services/{identifier}",
+        classes=["crm_pem:PE1_Service"],
+        patterns=[
+            Name("name"),
+            Type("pdlm:type/", "pdlm:type/metatype_placeholder/"),
+            Link("persons", "crm_pem:PP2_provided_by", "persons"),
+            Link("teams", "crm_pem:PP2_provided_by", "teams"),
+            Link("groups", "crm_pem:PP2_provided_by", "groups"),
+            Link(
+                "digital_hosting_services",
+                "crm:P9_consists_of",
+                "digital_hosting_services",
+            ),
+            Link(
+                "digital_curating_services",
+                "crm:P9_consists_of",
+                "digital_curating_services",
+            ),
+            Link("digital_objects", "crm:P67i_is_referred_to_By", "digital_objects"),
+        ],
+    ),
+    "digital_objects": Mapping(
+        subject="digital-object/{identifier}",
+        graph="digital-objects/{identifier}",
+        classes=["crm:D1_Digital_Object"],
+        patterns=[Name("name")],
+    ),
+    "digital_hosting_services": Mapping(
+        subject="activity/service/{identifier}",
+        graph="services/{identifier}",
+        classes=["crm_pem:PE5_Digital_Hosting_Service"],
+        patterns=[
+            Name("name"),
+            Link(
+                "provides_access_points",
+                "crm_pem:PP49_provides_access_point",
+                "access_points",
+            ),
+            Link(
+                "hosts_volatile_datasets",
+                "crm_pem:PP6_hosts_digital_object",
+                "volatile_datasets",
+            ),
+            Link(
+                "hosts_persistent_datasets",
+                "crm_pem:PP6_hosts_digital_object",
+                "persistent_datasets",
+            ),
+        ],
+    ),
+    "digital_curating_services": Mapping(
+        subject="activity/service/{identifier}",
+        graph="services/{identifier}",
+        classes=["crm_pem:PE10_Digital_Curating_Service"],
+        patterns=[
+            Name("name"),
+            Link(
+                "continued_digital_curating_services",
+                "crm:P134_continued",
+                "digital_curating_services",
+            ),
+            Link(
+                "curates_volatile_datasets",
+                "crm_pem:PP11_curates_volatile_digital_object",
+                "volatile_datasets",
+            ),
+        ],
+    ),
+    "volatile_datasets": Mapping(
+        subject="digital-object/dataset/{identifier}",
+        graph="project_datasets/{identifier}",
+        classes=["crm_pem:PE24_Volatile_Dataset"],
+        patterns=[
+            Name("name"),
+            Description("description", DESCRIPTION_TYPE),
+            Link(
+                "accessible_at_access_points",
+                "crm_pem:PP50_accessible_at",
+                "access_points",
+            ),
+            Link(
+                "has_persistent_dataset_snapshots",
+                "crm_pem:PP24_has_dataset_snapshot",
+                "persistent_datasets",
+            ),
+        ],
+    ),
+    "persistent_datasets": Mapping(
+        subject="digital-object/dataset/{identifier}",
+        graph="project_datasets/{identifier}",
+        classes=["crm_pem:PE22_Persistent_Dataset"],
+        patterns=[
+            Name("name"),
+            Description("description", DESCRIPTION_TYPE),
+            Link(
+                "accessible_at_access_points",
+                "crm_pem:PP50_accessible_at",
+                "access_points",
+            ),
+        ],
+    ),
+    "digital_machine_events": Mapping(
+        subject="activity/dme/{identifier}",
+        graph="digital_machine_events/{identifier}",
+        classes=["crm_dig:D7_Digital_Machine_Event"],
+        patterns=[
+            Link("was_motivated_by_projects", "crm:P17_was_motivated_by", "projects"),
+            Link(
+                "had_input_volatile_datasets",
+                "crm_dig:L10_had_input",
+                "volatile_datasets",
+            ),
+            Link(
+                "had_input_persistent_datasets",
+                "crm_dig:L10_had_input",
+                "persistent_datasets",
+            ),
+            Link(
+                "had_output_volatile_datasets",
+                "crm_dig:L11i_was_output_of",
+                "volatile_datasets",
+                inverse=True,
+            ),
+            Link(
+                "had_output_persistent_datasets",
+                "crm_dig:L11i_was_output_of",
+                "persistent_datasets",
+                inverse=True,
+            ),
+            Link("carried_out_by_persons", "crm:P14_carried_out_by", "persons"),
+        ],
+    ),
+    "topics": Mapping(
+        subject="topic/{identifier}",
+        graph="topics/{identifier}",
+        # topic is a type
+        classes=["crm:E55_Type"],
+        patterns=[Name("name")],
+    ),
+    "projects": Mapping(
+        subject="project/{canonical_name}",
+        graph="project_descriptions/{canonical_name}",
+        classes=["crm_pem:PE45_Research_Project"],
+        patterns=[
+            Name("name"),
+            Description("description", DESCRIPTION_TYPE),
+            TimeSpan("project_timeline_start", "project_timeline_end"),
+            Link(
+                "has_maintaining_teams", "crm_pem:PP44_has_maintaining_team", "teams"
+            ),
+            Link("supported_projects", "crm_pem:PP44_has_maintaining_team", "projects"),
+            Link("has_topics", "crm:P21_had_general_purpose", "topics"),
+        ],
+    ),
+}
+
+
+def template_column(template):
+    """(column, positional template) of a subject or graph template."""
+    (column,) = [field for _, field, _, _ in Formatter().parse(template) if field]
+    return column, template.replace("{" + column + "}", "{}")
+
+
+def mapping_fields(mapping):
+    """
+    Columns of the rows read by mapping, except the link columns. identifier
+    is always read, noco drops the rows without one.
+    """
+    fields = [
+        "identifier",
+        template_column(mapping.subject)[0],
+        template_column(mapping.graph)[0],
+    ]
+    for pattern in mapping.patterns:
+        if isinstance(pattern, TimeSpan):
+            fields += [pattern.start, pattern.end]
+        elif hasattr(pattern, "column"):
+            fields.append(pattern.column)
+    return list(dict.fromkeys(fields))
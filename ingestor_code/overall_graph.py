@@ -1,37 +1,95 @@
-from rdflib import Graph, Namespace
+from rdflib.namespace import RDF, RDFS, XSD
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
 import os
+import time
 import requests
 from requests.auth import HTTPBasicAuth
 from dotenv import load_dotenv
 import json
+from .drih_utils.nquads import nquads_to_trig, nquads_to_turtle
+from .drih_utils.stages import add_part, timed
+from .drih_utils.transport import Transport
 
 load_dotenv()
 
 # import data_test
 
+OUTPUTS = {
+    "nquads": "output/rdf/overall_nquads.txt",
+    "trig": "output/rdf/overall_trig.trig",
+    "ttl": "output/rdf/overall_flat.ttl",
+}
+# formats derived from the n-quads of the graph
+CONVERTERS = {"trig": nquads_to_trig, "ttl": nquads_to_turtle}
+
+
+def convert(task):
+    """Worker of serialize, returns the format and its wall and cpu time."""
+    format, nquads, destination, namespaces = task
+    start, cpu = time.perf_counter(), time.process_time()
+    CONVERTERS[format](nquads, destination, namespaces)
+    return format, time.perf_counter() - start, time.process_time() - cpu
+
 
 class OverallGraph:
-    def __init__(self, store, namespaces: list, credentials: dict, remote_url: str):
+    def __init__(
+        self,
+        store,
+        namespaces: list,
+        credentials: dict,
+        remote_url: str,
+        transport=None,
+        gzip_push=False,
+        nquads=None,
+        formats=tuple(OUTPUTS),
+    ):
         self.store = store
-        self.graph = Graph()
+        # n-quads output the graph was streamed to (-stream), store is empty
+        self.nquads = nquads
+        # of OUTPUTS, the ones serialize() writes
+        self.formats = formats
+        self.transport = transport or Transport()
+        self.gzip_push = gzip_push
         self.credentials = credentials
         if remote_url.endswith("/"):
             remote_url = remote_url[:-1]
         self.remote_url = remote_url
-        self.namespaces = {}
+        # prefixes of the trig and turtle outputs
+        self.namespaces = {"rdf": str(RDF), "rdfs": str(RDFS), "xsd": str(XSD)}
         for namespace in namespaces:
-            self.graph.bind(namespace["short_form"], Namespace(namespace["long_form"]))
-
-        for g in self.store.graphs():
-            for t in g.triples((None, None, None)):
-                self.graph.add(t)
+            self.namespaces[namespace["short_form"]] = namespace["long_form"]
 
     def serialize(self):
+        """
+        Write the formats asked for: the store is written once as n-quads
+        (unless streamed there already), the other formats are derived from
+        it at the same time in processes of their own.
+        """
         print("serializing the overall graph")
         os.makedirs("output/rdf", exist_ok=True)
-        self.store.serialize("output/rdf/overall_nquads.txt", format="nquads")
-        self.store.serialize("output/rdf/overall_trig.trig", format="trig")
-        self.graph.serialize("output/rdf/overall_flat.ttl", format="ttl")
+        derived = [format for format in self.formats if format in CONVERTERS]
+        nquads = self.nquads
+        if nquads is None and (derived or "nquads" in self.formats):
+            nquads = OUTPUTS["nquads"]
+            if "nquads" not in self.formats:
+                nquads += ".dump"
+            with timed("nquads"):
+                self.store.serialize(nquads, format="nquads")
+        tasks = [
+            (format, nquads, OUTPUTS[format], self.namespaces) for format in derived
+        ]
+        if len(tasks) > 1 and "fork" in multiprocessing.get_all_start_methods():
+            with ProcessPoolExecutor(
+                max_workers=len(tasks), mp_context=multiprocessing.get_context("fork")
+            ) as executor:
+                timings = list(executor.map(convert, tasks))
+        else:
+            timings = [convert(task) for task in tasks]
+        for format, wall_s, cpu_s in timings:
+            add_part(format, wall_s, cpu_s)
+        if nquads is not None and "nquads" not in self.formats:
+            os.remove(nquads)
         #        f = open("output/rdf/overall_flat.ttl", "r")
         #        content = f.read()
         #        ckg_prefixed = content.replace("http://digital.mpiwg-berlin.mpg.de/ns/", "ckg:")
@@ -64,7 +122,7 @@ class OverallGraph:
             self.credentials["username"], self.credentials["password"]
         )
         try:
-            r = requests.post(
+            r = self.transport.post(
                 self.remote_url + ":10214/sparql",
                 data=query,
                 headers=headers,
@@ -80,7 +138,7 @@ class OverallGraph:
                 queries.append(query)
                 # print("remote named graph to be purged: " + graph_name)
             try:
-                r = requests.post(
+                r = self.transport.post(
                     self.remote_url + ":10214/sparql",
                     data=(";").join(queries),
                     headers=headers,
@@ -97,11 +155,16 @@ class OverallGraph:
     def push_to_remote(self):
         print("pushing overall_trig.trig to remote")
         headers = {"content-type": "application/x-trig", "Accept-Charset": "UTF-8"}
-        r = requests.post(
-            self.remote_url + ":10215/blazegraph/sparql",
-            data=open("output/rdf/overall_trig.trig", "rb"),
-            headers=headers,
-        )
+        try:
+            r = self.transport.post_file(
+                self.remote_url + ":10215/blazegraph/sparql",
+                OUTPUTS["trig"],
+                headers=headers,
+                gzip_body=self.gzip_push,
+            )
+            r.raise_for_status()
+        except requests.exceptions.HTTPError as err:
+            raise SystemExit(err)
         print("done")
 
 
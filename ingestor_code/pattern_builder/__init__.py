@@ -1,239 +1,158 @@
-from rdflib import Literal, Namespace, RDF, URIRef
+import threading
+from rdflib import Namespace, RDF, RDFS
+
+# used for terms of namespaces missing from Meta_Namespaces
+STANDARD_NAMESPACES = {"rdf": RDF, "rdfs": RDFS}
 
 
 class PatternBuilder:
-    def __init__(self, graph, namespaces=list):
-        self.graph = graph
+    """
+    Writes the code of the recurring patterns into the emit functions
+    compiled from the mappings (see emitter.py). The code appends
+    (s, p, o, graph) quads with add, the entity being subject and its uri
+    relative to pdlm subject_string. One builder is shared by the run.
+    """
+
+    def __init__(self, namespaces=list):
         self.namespaces = {}
         for namespace in namespaces:
             self.namespaces[namespace["short_form"]] = Namespace(namespace["long_form"])
-            self.graph.bind(namespace["short_form"], Namespace(namespace["long_form"]))
         self.a = RDF.type
+        self.label = self.term("rdfs:label")
+        self.E55_Type = self.term("crm:E55_Type")
+        # graph the shared type declarations go to, None adds them to the
+        # graph of every entity using the type
+        self.vocabulary = None
+        self.declared = set()
+        self.lock = threading.Lock()
+
+    def term(self, name):
+        """URIRef of <short_form>:<name>"""
+        short_form, name = name.split(":", 1)
+        namespace = self.namespaces.get(short_form)
+        if namespace is None:
+            namespace = STANDARD_NAMESPACES[short_form]
+        return namespace[name]
+
+    def bind(self, graph):
+        """Bind the namespaces on graph, once per run on the dataset."""
+        for short_form, namespace in self.namespaces.items():
+            graph.bind(short_form, namespace)
+
+    def use_vocabulary(self, graph):
+        """
+        Add the declarations of the shared types and metatypes once to graph,
+        instead of once per entity using them.
+        """
+        self.vocabulary = graph
+        self.declared = set()
+
+    def declare(self, quads, graph, triple):
+        if self.vocabulary is None:
+            quads.append((*triple, graph))
+            return
+        with self.lock:
+            if triple in self.declared:
+                return
+            self.declared.add(triple)
+        quads.append((*triple, self.vocabulary))
+
+    def declare_type(self, code, type_uri, metatype_uri=None):
+        a, E55_Type = code.const(self.a), code.const(self.E55_Type)
+        type_term = self.term(type_uri)
+        type_uri = code.const(type_term)
+        code.line(f"declare(quads, graph, ({type_uri}, {a}, {E55_Type}))")
+        code.declarations.append((type_term, self.a, self.E55_Type))
+        if metatype_uri is not None:
+            P2_has_type = code.const(self.term("crm:P2_has_type"))
+            metatype_term = self.term(metatype_uri)
+            metatype_uri = code.const(metatype_term)
+            code.line(
+                f"declare(quads, graph, ({type_uri}, {P2_has_type}, {metatype_uri}))"
+            )
+            code.line(f"declare(quads, graph, ({metatype_uri}, {a}, {E55_Type}))")
+            code.declarations.append(
+                (type_term, self.term("crm:P2_has_type"), metatype_term)
+            )
+            code.declarations.append((metatype_term, self.a, self.E55_Type))
+        return type_uri
+
+    def node(self, code, path):
+        code.line(f"node = URIRef(subject_string + {path!r})")
+        return "node"
+
+    def value(self, code, column, name="value"):
+        code.line(f"{name} = Literal(row[{column!r}])")
+        return name
 
     # laf.6
-    def add_name(self, entity_uri: str, name_uri: str, name_string: str):
-        entity_uri_ref = URIRef(entity_uri)
-        name_literal = Literal(name_string)
-        name_uri_ref = URIRef(name_uri)
-
-        self.graph.add(
-            (entity_uri_ref, self.namespaces["crm"].P1_is_identified_by, name_uri_ref)
-        )
-        self.graph.add(
-            (
-                name_uri_ref,
-                self.a,
-                self.namespaces["crm"].E33_E41_Linguistic_Appellation,
-            )
-        )
-        self.graph.add(
-            (
-                name_uri_ref,
-                self.namespaces["crm"].P190_has_symbolic_content,
-                name_literal,
-            )
-        )
+    def add_name(self, code, pattern):
+        node = self.node(code, pattern.path)
+        value = self.value(code, pattern.column)
+        code.add("subject", self.term("crm:P1_is_identified_by"), node)
+        code.add(node, self.a, self.term("crm:E33_E41_Linguistic_Appellation"))
+        code.add(node, self.term("crm:P190_has_symbolic_content"), value)
         # label
-        self.graph.add((entity_uri_ref, self.namespaces["rdfs"].label, name_literal))
+        code.add("subject", self.label, value)
 
     # pdlf.1 and pdlf.2
-    def add_description(
-        self,
-        entity_uri: str,
-        description_uri: str,
-        description_string: str,
-        description_type_uri: str = None,
-    ):
-        entity_uri_ref = URIRef(entity_uri)
-        description_literal = Literal(description_string)
-        description_uri_ref = URIRef(description_uri)
-
-        self.graph.add(
-            (
-                entity_uri_ref,
-                self.namespaces["crm"].P129i_is_subject_of,
-                description_uri_ref,
-            )
-        )
-        self.graph.add(
-            (
-                description_uri_ref,
-                self.a,
-                self.namespaces["crm"].E33_Linguistic_Object,
-            )
-        )
-        self.graph.add(
-            (
-                description_uri_ref,
-                self.namespaces["crm"].P190_has_symbolic_content,
-                description_literal,
-            )
-        )
+    def add_description(self, code, pattern):
+        node = self.node(code, pattern.path)
+        value = self.value(code, pattern.column)
+        code.add("subject", self.term("crm:P129i_is_subject_of"), node)
+        code.add(node, self.a, self.term("crm:E33_Linguistic_Object"))
+        code.add(node, self.term("crm:P190_has_symbolic_content"), value)
 
         # description type
-        if description_type_uri != None:
-            description_type_uri_ref = URIRef(description_type_uri)
-            self.graph.add(
-                (
-                    description_uri_ref,
-                    self.namespaces["crm"].P2_has_type,
-                    description_type_uri_ref,
-                )
-            )
-
-            self.graph.add(
-                (
-                    description_type_uri_ref,
-                    self.a,
-                    self.namespaces["crm"].E55_Type,
-                )
-            )
+        if pattern.type is not None:
+            type_uri = self.declare_type(code, pattern.type)
+            code.add(node, self.term("crm:P2_has_type"), type_uri)
 
     # laf.11 and laf.12
-    def add_type(self, entity_uri: str, type_uri: str, metatype_uri: str = None):
-        entity_uri_ref = URIRef(entity_uri)
-        type_uri_ref = URIRef(type_uri)
-
-        self.graph.add(
-            (
-                entity_uri_ref,
-                self.namespaces["crm"].P2_has_type,
-                type_uri_ref,
-            )
-        )
-
-        self.graph.add(
-            (
-                type_uri_ref,
-                self.a,
-                self.namespaces["crm"].E55_Type,
-            )
-        )
-
-        # metatype
-        if metatype_uri != None:
-            metatype_uri_ref = URIRef(metatype_uri)
-            self.graph.add(
-                (
-                    type_uri_ref,
-                    self.namespaces["crm"].P2_has_type,
-                    metatype_uri_ref,
-                )
-            )
-            self.graph.add(
-                (
-                    metatype_uri_ref,
-                    self.a,
-                    self.namespaces["crm"].E55_Type,
-                )
-            )
+    def add_type(self, code, pattern):
+        type_uri = self.declare_type(code, pattern.type, pattern.metatype)
+        code.add("subject", self.term("crm:P2_has_type"), type_uri)
 
     # laf.10 and laf.9
-    def add_identifier(
-        self,
-        entity_uri: str,
-        identifier_uri: str,
-        identifier_string: str,
-        identifier_type_uri: str = None,
-    ):
-        entity_uri_ref = URIRef(entity_uri)
-        identifier_uri_ref = URIRef(identifier_uri)
-        identifier_string_literal = Literal(identifier_string)
-
-        self.graph.add(
-            (
-                entity_uri_ref,
-                self.namespaces["crm"].P1_is_identified_by,
-                identifier_uri_ref,
-            )
-        )
-
-        self.graph.add(
-            (
-                identifier_uri_ref,
-                self.a,
-                self.namespaces["crm"].E42_Identifier,
-            )
-        )
-
-        self.graph.add(
-            (
-                identifier_uri_ref,
-                self.namespaces["crm"].P190_has_symbolic_content,
-                identifier_string_literal,
-            )
-        )
-
-        # identifier type
-        if identifier_type_uri != None:
-            identifier_type_uri_ref = URIRef(identifier_type_uri)
-            self.graph.add(
-                (
-                    identifier_uri_ref,
-                    self.namespaces["crm"].P2_has_type,
-                    identifier_type_uri_ref,
-                )
-            )
-
-            self.graph.add(
-                (
-                    identifier_type_uri_ref,
-                    self.a,
-                    self.namespaces["crm"].E55_Type,
-                )
-            )
-
-    # pdlf.3
-    def add_digital_access_point(
-        self,
-        entity_uri: str,
-        digital_access_point_uri: str,
-        digital_access_point_string: str,
-        digital_access_point_type_uri: str = None,
-    ):
-        entity_uri_ref = URIRef(entity_uri)
-        digital_access_point_uri_ref = URIRef(digital_access_point_uri)
-        digital_access_point_string_literal = Literal(digital_access_point_string)
-
-        self.graph.add(
-            (
-                entity_uri_ref,
-                self.namespaces["crm"].PP50_accessible_at,
-                digital_access_point_uri_ref,
-            )
-        )
-
-        self.graph.add(
-            (
-                digital_access_point_uri_ref,
-                self.a,
-                self.namespaces["crm"].PE29_access_point,
-            )
-        )
-
-        self.graph.add(
-            (
-                digital_access_point_uri_ref,
-                self.namespaces["crm"].P190_has_symbolic_content,
-                digital_access_point_string_literal,
-            )
-        )
+    def add_identifier(self, code, pattern):
+        node = self.node(code, pattern.path)
+        value = self.value(code, pattern.column)
+        code.add("subject", self.term("crm:P1_is_identified_by"), node)
+        code.add(node, self.a, self.term("crm:E42_Identifier"))
+        code.add(node, self.term("crm:P190_has_symbolic_content"), value)
 
         # identifier type
-        if digital_access_point_type_uri != None:
-            digital_access_point_type_uri_ref = URIRef(digital_access_point_type_uri)
-            self.graph.add(
-                (
-                    digital_access_point_uri_ref,
-                    self.namespaces["crm"].P2_has_type,
-                    digital_access_point_type_uri_ref,
-                )
-            )
-
-            self.graph.add(
-                (
-                    digital_access_point_type_uri_ref,
-                    self.a,
-                    self.namespaces["crm"].E55_Type,
-                )
-            )
+        if pattern.type is not None:
+            type_uri = self.declare_type(code, pattern.type)
+            code.add(node, self.term("crm:P2_has_type"), type_uri)
+
+    def add_contact_point(self, code, pattern):
+        node = self.node(code, pattern.path)
+        value = self.value(code, pattern.column)
+        code.add("subject", self.term("crm:P76_has_contact_point"), node)
+        code.add(node, self.a, self.term("crm:E41_Appellation"))
+        code.add(node, self.term("crm:P190_has_symbolic_content"), value)
+
+    def add_attribute(self, code, pattern):
+        value = self.value(code, pattern.column)
+        code.add("subject", self.term(pattern.predicate), value)
+
+    def add_time_span(self, code, pattern):
+        start = self.value(code, pattern.start, "start")
+        end = self.value(code, pattern.end, "end")
+        with code.block(f"if {start} and {end}:"):
+            node = self.node(code, pattern.path)
+            code.add("subject", self.term("crm:P4_has_time-span"), node)
+            code.add(node, self.term("crm:P82a_begin_of_the_begin"), start)
+            code.add(node, self.term("crm:P82b_end_of_the_end"), end)
+
+    def add_link(self, code, pattern, subject_of):
+        """subject_of mints the subjects of the target rows."""
+        subject_of = code.const(subject_of)
+        code.line(f"rows = index[{pattern.target!r}]")
+        with code.block(f"for target_id in row.get({pattern.output!r}) or ():"):
+            code.line(f"target = {subject_of}(rows[target_id])")
+            if pattern.inverse:
+                code.add("target", self.term(pattern.predicate), "subject")
+            else:
+                code.add("subject", self.term(pattern.predicate), "target")
@@ -0,0 +1,70 @@
+class Record(tuple):
+    """
+    Immutable, compact row of a nocodb table: a tuple read by column name
+    like the dict it replaces (row["name"], "name" in row, row.get(...)).
+    The classes for each table are generated by record_class.
+    """
+
+    __slots__ = ()
+    COLUMNS = ()
+    # column -> position in the tuple
+    POSITIONS = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return tuple.__getitem__(self, self.POSITIONS[key])
+        return tuple.__getitem__(self, key)
+
+    def __contains__(self, key):
+        return key in self.POSITIONS
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.as_dict()!r})"
+
+    def __reduce__(self):
+        return (_unpickle_record, (type(self).__name__, self.COLUMNS, tuple(self)))
+
+    def get(self, key, default=None):
+        position = self.POSITIONS.get(key)
+        if position is None:
+            return default
+        return tuple.__getitem__(self, position)
+
+    def keys(self):
+        return self.COLUMNS
+
+    def as_dict(self):
+        return dict(zip(self.COLUMNS, self))
+
+    def replace(self, **values):
+        """Copy of the record with the given columns replaced."""
+        return self.from_dict({**self.as_dict(), **values})
+
+    @classmethod
+    def from_dict(cls, row: dict):
+        return cls(row.get(column) for column in cls.COLUMNS)
+
+
+# (name, columns) -> record class
+_record_classes = {}
+
+
+def record_class(name, columns):
+    """Record class holding the given columns, one class per table schema."""
+    columns = tuple(columns)
+    key = (name, columns)
+    if key not in _record_classes:
+        _record_classes[key] = type(
+            name,
+            (Record,),
+            {
+                "__slots__": (),
+                "COLUMNS": columns,
+                "POSITIONS": {column: i for i, column in enumerate(columns)},
+            },
+        )
+    return _record_classes[key]
+
+
+def _unpickle_record(name, columns, values):
+    return record_class(name, columns)(values)
@@ -0,0 +1,206 @@
+from collections import namedtuple
+from .mapping import FIELDS, MAPPINGS, mapping_fields
+from .records import record_class
+
+# a link column of a nocodb table: the rows of source refer to the rows of
+# target whose Id is ref[key] for each ref in row[column]; the resolved target
+# Ids are stored in record[output], where the emitters read them (see
+# mapping.py). source and target are DataService attributes.
+Relation = namedtuple("Relation", ["source", "column", "target", "key", "output"])
+
+RELATIONS = [
+    # team has members
+    Relation("teams", "members", "persons", "Id", "persons"),
+    # group has person and group members
+    Relation("groups", "members", "persons", "Id", "persons"),
+    Relation("groups", "members_groups", "groups", "Id", "groups"),
+    # service is provided by person, group, team
+    Relation("services", "provided_by_person", "persons", "Id", "persons"),
+    Relation("services", "provided_by_group", "groups", "Id", "groups"),
+    Relation("services", "provided_by_team", "teams", "Id", "teams"),
+    # service consists of digital hosting and curating services
+    Relation(
+        "services",
+        "consists_of_digital_hosting_service",
+        "digital_hosting_services",
+        "Id",
+        "digital_hosting_services",
+    ),
+    Relation(
+        "services",
+        "consists_of_digital_curating_service",
+        "digital_curating_services",
+        "Id",
+        "digital_curating_services",
+    ),
+    # service is referred to by digital objects
+    Relation("services", "is_referred_to_by", "digital_objects", "Id", "digital_objects"),
+    # digital curating service curates volatile datasets, continued services
+    Relation(
+        "digital_curating_services",
+        "curates",
+        "volatile_datasets",
+        "Id",
+        "curates_volatile_datasets",
+    ),
+    Relation(
+        "digital_curating_services",
+        "continued",
+        "digital_curating_services",
+        "Id",
+        "continued_digital_curating_services",
+    ),
+    # digital hosting service provides access points, hosts datasets
+    Relation(
+        "digital_hosting_services",
+        "provides_access_point",
+        "access_points",
+        "Id",
+        "provides_access_points",
+    ),
+    Relation(
+        "digital_hosting_services",
+        "hosts_digital_object_volatile_dataset",
+        "volatile_datasets",
+        "Id",
+        "hosts_volatile_datasets",
+    ),
+    Relation(
+        "digital_hosting_services",
+        "hosts_digital_object_persistent_dataset",
+        "persistent_datasets",
+        "Id",
+        "hosts_persistent_datasets",
+    ),
+    # datasets are accessible at access points, volatile have snapshots
+    Relation(
+        "volatile_datasets",
+        "accessible_at",
+        "access_points",
+        "Id",
+        "accessible_at_access_points",
+    ),
+    Relation(
+        "volatile_datasets",
+        "has_dataset_snapshot",
+        "persistent_datasets",
+        "Id",
+        "has_persistent_dataset_snapshots",
+    ),
+    Relation(
+        "persistent_datasets",
+        "accessible_at",
+        "access_points",
+        "Id",
+        "accessible_at_access_points",
+    ),
+    # dme was motivated by project, had input/output datasets, carried out by
+    Relation(
+        "digital_machine_events",
+        "was_motivated_by",
+        "projects",
+        "Id",
+        "was_motivated_by_projects",
+    ),
+    Relation(
+        "digital_machine_events",
+        "had_input",
+        "volatile_datasets",
+        "Id",
+        "had_input_volatile_datasets",
+    ),
+    Relation(
+        "digital_machine_events",
+        "had_output",
+        "persistent_datasets",
+        "Id",
+        "had_output_persistent_datasets",
+    ),
+    # dme had output volatile dataset
+    Relation(
+        "digital_machine_events",
+        "PE24_Volatile_Datasets List",
+        "volatile_datasets",
+        "Id",
+        "had_output_volatile_datasets",
+    ),
+    Relation(
+        "digital_machine_events",
+        "carried_out_by_person",
+        "persons",
+        "Id",
+        "carried_out_by_persons",
+    ),
+    # project has topics (only one atm)
+    # name of the relation is some weird nocodb convention
+    Relation(
+        "projects", "nc_j8_t___nc_m2m__eofowxvl5s", "topics", "table2_id", "has_topics"
+    ),
+    # project has maintaining teams, supported projects
+    Relation("projects", "teams", "teams", "Id", "has_maintaining_teams"),
+    Relation(
+        "projects", "supported_project_activity", "projects", "Id", "supported_projects"
+    ),
+]
+
+
+def link_columns(attribute, relations=RELATIONS):
+    return [relation.column for relation in relations if relation.source == attribute]
+
+
+def table_fields(attribute, relations=RELATIONS):
+    """
+    Columns of the table of attribute the ingestor reads: the ones its
+    mapping reads plus its link columns. None reads every column.
+    """
+    if attribute in MAPPINGS:
+        fields = mapping_fields(MAPPINGS[attribute])
+    else:
+        fields = FIELDS.get(attribute)
+    if fields is None:
+        return None
+    return ["Id"] + fields + link_columns(attribute, relations)
+
+
+def resolve_relations(data_service, relations=RELATIONS):
+    """
+    Turn the fetched rows of every table into immutable records in a single
+    pass, with each relation resolved, through the Id indexes of
+    data_service, into the tuple of target Ids held in record[output]. The
+    link columns themselves are not kept. Returns the number of links.
+    """
+    by_source = {}
+    for relation in relations:
+        by_source.setdefault(relation.source, []).append(relation)
+
+    n_links = 0
+    tables = {}
+    for attribute, table_name in data_service.TABLES.items():
+        rows = getattr(data_service, attribute)
+        source_relations = by_source.get(attribute, [])
+        link_columns = {relation.column for relation in source_relations}
+        columns = [
+            column
+            for column in dict.fromkeys(key for row in rows for key in row)
+            if column not in link_columns
+        ]
+        columns += [relation.output for relation in source_relations]
+        record = record_class(table_name, columns)
+
+        records = []
+        for row in rows:
+            values = dict(row)
+            for relation in source_relations:
+                ids = tuple(ref[relation.key] for ref in row[relation.column])
+                for target_id in ids:
+                    # raises for dangling links
+                    data_service.lookup(relation.target, target_id)
+                values[relation.output] = ids
+                n_links += len(ids)
+            records.append(record.from_dict(values))
+        tables[attribute] = records
+
+    for attribute, records in tables.items():
+        data_service.set_rows(attribute, records)
+    return n_links
+
@@ -0,0 +1,192 @@
+"""
+Synthetic nocodb tables at a configurable scale, to benchmark and load test
+the ingestor without nocodb:
+
+    python -m ingestor_code.synthetic -persons 100000 -fanout 3 -cache_dir output/synthetic/
+    python -m ingestor_code -offline -cache_dir output/synthetic/
+
+The rows of every table DataService reads are written, one table at a time,
+as snapshots of the SnapshotCache that -offline reads instead of nocodb. They
+hold the columns the ingestor reads (table_fields) and links shaped like the
+ones of nocodb: lists of {"Id": ...} refs, {"table1_id": ..., "table2_id": ...}
+for the many to many between projects and topics.
+"""
+import argparse
+import random
+from .drih_utils.cache import SnapshotCache
+from .mapping import (
+    MAPPINGS,
+    TABLES,
+    Attribute,
+    ContactPoint,
+    Description,
+    Name,
+    TimeSpan,
+    template_column,
+)
+from .relations import RELATIONS, table_fields
+
+# rows per person of the other tables
+SCALE = {
+    "projects": 0.05,
+    "persons": 1,
+    "teams": 0.1,
+    "groups": 0.05,
+    "services": 0.05,
+    "digital_objects": 0.5,
+    "digital_curating_services": 0.02,
+    "digital_hosting_services": 0.02,
+    "volatile_datasets": 0.2,
+    "persistent_datasets": 0.2,
+    "access_points": 0.2,
+    "digital_machine_events": 0.3,
+    "topics": 0.01,
+}
+TYPES = 20
+
+# stand-ins for the rows of Meta_Namespaces, the prefixes the mappings use
+NAMESPACES = [
+    ("ckg", "http://digital.mpiwg-berlin.mpg.de/ns/"),
+    ("pdlm", "http://digital.mpiwg-berlin.mpg.de/ns/pdlm/"),
+    ("crm", "http://www.cidoc-crm.org/cidoc-crm/"),
+    ("crm_pem", "http://parthenos.d4science.org/CRMext/CRMpe.rdfs/"),
+    ("crm_dig", "http://www.ics.forth.gr/isl/CRMext/CRMdig.rdfs/"),
+    ("rdfs", "http://www.w3.org/2000/01/rdf-schema#"),
+]
+
+UPDATED_AT = "2024-01-01 00:00:00"
+
+
+def table_counts(persons, counts=None):
+    """attribute -> number of rows, counts overrides the scaled ones."""
+    sizes = {
+        attribute: max(1, round(persons * scale)) for attribute, scale in SCALE.items()
+    }
+    sizes["types"] = TYPES
+    sizes["namespaces"] = len(NAMESPACES)
+    sizes.update(counts or {})
+    return sizes
+
+
+def column_values(attribute):
+    """column -> function(Id, identifier) of the values of the mapped columns."""
+    mapping = MAPPINGS[attribute]
+    values = {}
+    for template in (mapping.subject, mapping.graph):
+        column = template_column(template)[0]
+        values[column] = lambda i, identifier: identifier
+    for pattern in mapping.patterns:
+        if isinstance(pattern, Name):
+            values[pattern.column] = lambda i, identifier: f"{attribute} {i}"
+        elif isinstance(pattern, Description):
+            values[pattern.column] = lambda i, identifier: f"description of {identifier}"
+        elif isinstance(pattern, ContactPoint):
+            values[pattern.column] = lambda i, identifier: f"{identifier}@example.org"
+        elif isinstance(pattern, Attribute):
+            values[pattern.column] = (
+                lambda i, identifier: f"https://example.org/{identifier}"
+            )
+        elif isinstance(pattern, TimeSpan):
+            # a tenth of the rows have no time-span
+            values[pattern.start] = (
+                lambda i, identifier: None if i % 10 == 0 else f"{2000 + i % 20}-01-01"
+            )
+            values[pattern.end] = lambda i, identifier: f"{2020 + i % 5}-12-31"
+    values["identifier"] = lambda i, identifier: identifier
+    return values
+
+
+def links(rng, relation, row_id, targets, fanout):
+    """Refs of a row to about fanout random rows of the target table."""
+    k = min(rng.randint(0, 2 * fanout), targets)
+    ids = rng.sample(range(1, targets + 1), k)
+    if relation.key == "Id":
+        return [{"Id": target_id} for target_id in ids]
+    return [{"table1_id": row_id, "table2_id": target_id} for target_id in ids]
+
+
+def rows(attribute, sizes, fanout, rng):
+    """The rows of the table of attribute, one at a time."""
+    if attribute == "namespaces":
+        for i, (short_form, long_form) in enumerate(NAMESPACES, 1):
+            yield {"Id": i, "short_form": short_form, "long_form": long_form}
+        return
+    prefix = TABLES[attribute].split("_")[0].lower()
+    if attribute == "types":
+        for i in range(1, sizes["types"] + 1):
+            yield {"Id": i, "identifier": f"{prefix}_{i:07d}", "name": f"type {i}"}
+        return
+
+    values = column_values(attribute)
+    relations = [relation for relation in RELATIONS if relation.source == attribute]
+    for i in range(1, sizes[attribute] + 1):
+        identifier = f"{prefix}_{i:07d}"
+        row = {"Id": i}
+        for column, value in values.items():
+            row[column] = value(i, identifier)
+        for relation in relations:
+            row[relation.column] = links(
+                rng, relation, i, sizes[relation.target], fanout
+            )
+        yield row
+
+
+def generate(cache_dir, persons, fanout=2, counts=None, seed=0):
+    """Write the snapshots of all tables to cache_dir, returns their sizes."""
+    cache = SnapshotCache(cache_dir)
+    rng = random.Random(seed)
+    sizes = table_counts(persons, counts)
+    for attribute, table_name in TABLES.items():
+        state = {
+            "count": sizes[attribute],
+            "updated_at": UPDATED_AT,
+            "fields": table_fields(attribute),
+        }
+        cache.store(table_name, rows(attribute, sizes, fanout, rng), state)
+        print(f"  {table_name:<32} {sizes[attribute]:>9} rows")
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "-persons",
+        help="number of persons, the other tables are scaled after it (default: 10000)",
+        type=int,
+        default=10000,
+    )
+    parser.add_argument(
+        "-fanout",
+        help="average number of links of a row per link column (default: 2)",
+        type=int,
+        default=2,
+    )
+    parser.add_argument(
+        "-count",
+        help="number of rows of a table, e.g. -count projects=500 (repeatable)",
+        action="append",
+        default=[],
+    )
+    parser.add_argument(
+        "-seed", help="seed of the random links (default: 0)", type=int, default=0
+    )
+    parser.add_argument(
+        "-cache_dir",
+        help="directory the snapshots are written to (default: output/synthetic/)",
+        default="output/synthetic/",
+    )
+    args = parser.parse_args()
+
+    counts = {}
+    for count in args.count:
+        attribute, _, n = count.partition("=")
+        if attribute not in TABLES or not n.isdigit():
+            parser.error(f"-count {count}: expected <table>=<rows>, tables: {', '.join(TABLES)}")
+        counts[attribute] = int(n)
+
+    print(f"generating synthetic tables in {args.cache_dir}")
+    generate(args.cache_dir, args.persons, args.fanout, counts, args.seed)
+
+
+if __name__ == "__main__":
+    main()